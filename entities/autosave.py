@@ -0,0 +1,148 @@
+from functools import partial
+from queue import Queue
+from threading import Thread
+
+from entities.regions import RegionStreamer
+from entities.save_journal import SaveChangesTracker, append_journal, write_snapshot
+from pygame_entities.entities.entity import Entity
+from pygame_entities.utils.math import Vector2
+
+
+class AutoSave(Entity):
+    """
+    Сущность, которая периодически сохраняет игру в фоновом потоке.
+
+    Сохраняются только изменения с прошлого сохранения, они дописываются в журнал (см. `save_journal`).
+    При создании и после `compact_after` изменений весь мир записывается новым снимком.
+    Если передан `streamer`, то сохраняются и спящие сущности.
+
+    В кадре сохранения на главном потоке только собираются записи сущностей
+    (`to_json()` возвращает новые словари, которые потом не меняются игрой),
+    а кодирование, сжатие и запись файла идут в отдельном потоке.
+    Поток создается один раз, что бы не ждать его запуска в кадре сохранения.
+
+    Пока прошлое сохранение пишется, новое не начинается.
+    Ошибки фонового потока выводятся на главном потоке (см. `report_error`)
+    """
+
+    def __init__(self, path: str, interval: float = 60, backups: int = 2, compress=True, compact_after: int = 1000,
+                 streamer: RegionStreamer = None) -> None:
+        super().__init__(Vector2(0, 0))
+
+        self.path = path
+        # Интервал между сохранениями в секундах
+        self.interval = interval
+        self.backups = backups
+        self.compress = compress
+        # Сколько изменений можно дописать в журнал до записи нового снимка
+        self.compact_after = compact_after
+
+        # Последняя ошибка фонового сохранения, если она была
+        self.last_error: Exception = None
+        # После ошибки неизвестно, какой снимок и журнал на диске, поэтому мир записывается заново
+        self._needs_snapshot = False
+
+        self._time_since_save = 0
+        self._tracker = SaveChangesTracker(streamer)
+        self._changes_in_journal = 0
+
+        # Очередь функций записи для потока. None останавливает поток
+        self._queue = Queue()
+        self._thread = Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+        self.compact()
+
+        self.subscribe_on_update(self.update_timer)
+        self.subscribe_on_destroy(self.stop)
+
+    def update_timer(self, delta_time: float):
+        self.report_error()
+        self._time_since_save += delta_time
+
+        if self._time_since_save >= self.interval:
+            self.save()
+
+    @property
+    def is_saving(self) -> bool:
+        return self._queue.unfinished_tasks > 0
+
+    def save(self) -> bool:
+        """
+        Начинает сохранение в фоне. Возвращает False, если прошлое сохранение еще не закончилось
+        """
+        if self.is_saving:
+            return False
+
+        self.report_error()
+
+        if self._needs_snapshot or self._changes_in_journal >= self.compact_after:
+            self.compact()
+            return True
+
+        self._time_since_save = 0
+        changes = self._tracker.collect_changes()
+
+        if changes:
+            self._changes_in_journal += len(changes)
+            self._queue.put(partial(append_journal, self.path, changes))
+
+        return True
+
+    def compact(self):
+        """
+        Записывает весь мир новым снимком и очищает журнал
+        """
+        self._time_since_save = 0
+        self._changes_in_journal = 0
+        self._needs_snapshot = False
+        records = self._tracker.snapshot()
+
+        self._queue.put(partial(write_snapshot, self.path, self._tracker.token,
+                                records, self.compress, self.backups))
+
+    def report_error(self) -> bool:
+        """
+        Выводит ошибку фонового сохранения, если она была, и возвращает True.
+
+        Если не записался снимок, то журнал на диске остался от старого снимка,
+        а ключи трекера уже от нового, поэтому после ошибки следующее сохранение записывает новый снимок
+        """
+        error = self.last_error
+        if error is None:
+            return False
+
+        self.last_error = None
+        self._needs_snapshot = True
+        print(f"Autosave to {self.path} failed: {error!r}")
+
+        return True
+
+    def _write_loop(self):
+        while True:
+            write = self._queue.get()
+
+            try:
+                if write is None:
+                    return
+
+                write()
+            except Exception as e:
+                self.last_error = e
+            finally:
+                self._queue.task_done()
+
+    def wait(self):
+        """
+        Ждет окончания фонового сохранения
+        """
+        self._queue.join()
+
+    def stop(self):
+        """
+        Дожидается сохранения и останавливает поток
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self._tracker.close()
+        self.report_error()
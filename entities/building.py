@@ -39,11 +39,11 @@ class BuildingItem(UsableItem):
         spawn_position = snap_position_to_grid(initiator.game.from_screen_to_world_point(
             Vector2.from_tuple(pygame.mouse.get_pos())))
 
-        if (initiator.position - spawn_position).magnitude() > self.MAX_BUILDING_RANGE:
+        if initiator.position.distance_squared_to(spawn_position) > self.MAX_BUILDING_RANGE ** 2:
             Popup(spawn_position, "Too far!", assets.FONT_30, False)
             return
 
-        if any(map(lambda x: (x.position - spawn_position).magnitude() <= assets.SPRITE_SIZE[0] / 1.5, filter(lambda x: isinstance(x, CollisionMixin), initiator.game.enabled_entities))):
+        if any(initiator.game.query_radius(spawn_position, assets.SPRITE_SIZE[0] / 1.5, CollisionMixin)):
             Popup(spawn_position, "Need more space to build!",
                   assets.FONT_30, False)
             return
@@ -58,6 +58,8 @@ class Building(LivingEntity, OnMapSpriteMixin, CollisionMixin):
     HP = 1000
     IS_TRIGGER = False
     IS_USABLE = False
+    # Постройки не двигаются, их коллайдеры статичные
+    IS_STATIC = True
 
     COLLISION_BOX = None
 
@@ -67,7 +69,7 @@ class Building(LivingEntity, OnMapSpriteMixin, CollisionMixin):
         self.sprite_init(SpriteWithCameraOffset(self.IMAGE), Vector2())
 
         self.collision_init((Vector2.from_tuple(
-            self.IMAGE.get_size()) / 2 if self.COLLISION_BOX is None else self.COLLISION_BOX), self.IS_TRIGGER, self.IS_USABLE)
+            self.IMAGE.get_size()) / 2 if self.COLLISION_BOX is None else self.COLLISION_BOX), self.IS_TRIGGER, self.IS_USABLE, self.IS_STATIC)
 
     def use(self, initiator: Entity):
         raise NotImplementedError("Building's use() needs to be implemented")
@@ -7,6 +7,7 @@ from assets import SPRITE_SIZE, Sprites, FONT_30 as FONT
 from entities.building import Building
 from entities.item import ItemEntity
 from entities.json_parser import json_dict_into_object, register_json
+from entities.save_journal import mark_dirty
 from entities.ui import ActionsPanel, Popup
 from items.items import BaseAxe, BasePickaxe, Coal, Gold, GoldIngot, GoldenAxe, GoldenPickaxe, GoldenSword, Iron, IronAxe, IronIngot, IronPickaxe, IronSword, Rock, StoneAxe, Wood, WoodenAxe, WoodenPickaxe, WoodenSword, StoneSword, StonePickaxe
 from items.recipes import Recipe
@@ -72,12 +73,10 @@ class Chest(Building):
         action_list.render()
 
     def pick_nearest_items(self):
-        for ent in self.game.enabled_entities:
-            if not type(ent) == ItemEntity or (ent.position - self.position).magnitude() > self.ITEMS_PICKUP_RADIUS:
-                continue
-
+        for ent in self.game.query_radius(self.position, self.ITEMS_PICKUP_RADIUS, ItemEntity):
             ent: ItemEntity
             ent.item = self.inventory.add_item(ent.item)
+            mark_dirty(self)
 
     def drop_item(self, slot_index: int):
         item = self.inventory.get_slot(slot_index)
@@ -86,6 +85,7 @@ class Chest(Building):
             return
 
         ItemEntity(self.position, self.inventory.swap_slot(slot_index, None))
+        mark_dirty(self)
 
     def get_loot(self) -> List["Item"]:
         return super().get_loot() + list(filter(lambda x: not x is None, self.inventory.grid))
@@ -182,10 +182,7 @@ class Workbench(Building):
             self.position, f"{recipe.name}", FONT, False)
 
     def count_nearby_items(self) -> List["ItemEntity"]:
-        return [ent for ent in self.game.enabled_entities
-                if type(ent) == ItemEntity and
-                (ent.position - self.position).magnitude() <= self.ITEMS_PICKUP_RADIUS
-                ]
+        return list(self.game.query_radius(self.position, self.ITEMS_PICKUP_RADIUS, ItemEntity))
 
 
 register_json(Workbench.get_item_class())
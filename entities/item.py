@@ -2,6 +2,7 @@ import pygame
 from assets import FONT_PATH
 from entities.json_parser import json_dict_into_object, register_json
 from items import Item
+from entities.save_journal import mark_dirty
 from entities.ui import Popup
 from pygame_entities.entities.mixins import SpriteMixin
 from pygame_entities.utils.math import Vector2
@@ -27,6 +28,8 @@ class ItemEntity(SpriteMixin):
         self.update_item()
 
     def update_item(self):
+        mark_dirty(self)
+
         if self.item is None or self.item.amount <= 0:
             self.destroy()
             Popup(self.position, "Picked up!",
@@ -6,6 +6,7 @@ from pygame_entities.utils.math import Vector2, clamp
 
 from items.item import Item
 from entities.item import ItemEntity
+from entities.save_journal import mark_dirty
 
 
 class LivingEntity(Entity):
@@ -20,13 +21,24 @@ class LivingEntity(Entity):
         super().__init__(position)
         self.max_hp = max_hp
         self.hp = max_hp
-        self.hurt_particle_system = ParticleSystem(
-            self.position,
-            self.ON_HURT_PARTICLE_IMAGE,
-            2,
-            min_particle_velocity=Vector2(-8, -8),
-            max_particle_velocity=Vector2(8, 8)
-        )
+        # Создается при первом уроне, что бы у каждого дерева и камня не было своей системы частиц
+        self._hurt_particle_system: ParticleSystem = None
+
+    @property
+    def hurt_particle_system(self) -> ParticleSystem:
+        if self._hurt_particle_system is None:
+            self._hurt_particle_system = ParticleSystem(
+                self.position,
+                self.ON_HURT_PARTICLE_IMAGE,
+                2,
+                min_particle_velocity=Vector2(-480, -480),
+                max_particle_velocity=Vector2(480, 480)
+            )
+            # Частицы от последнего удара долетают и после смерти сущности
+            self.subscribe_on_destroy(
+                self._hurt_particle_system.destroy_when_idle)
+
+        return self._hurt_particle_system
 
     def add_hp(self, amount: int, initiator=None):
         """
@@ -35,12 +47,14 @@ class LivingEntity(Entity):
         Если после добавления `amount` здоровье стало меньше или равно нулю, то вызывается метод `on_die()`
         """
 
+        self.hurt_particle_system.position = self.position
         self.hurt_particle_system.burst(self.ON_HURT_PARTICLE_COUNT)
 
         self.set_hp(self.hp + amount)
 
     def set_hp(self, amount: int):
         self.hp = amount
+        mark_dirty(self)
 
         if self.hp <= 0:
             self.on_die()
@@ -1,5 +1,11 @@
-from typing import List, Tuple
+from array import array
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Tuple, Type
 from random import choices, choice
+from time import perf_counter
 
 from assets import Sprites, SPRITE_SIZE
 from entities.json_parser import register_json
@@ -9,19 +15,42 @@ from pygame_entities.entities.mixins import CollisionMixin
 from pygame_entities.entities.entity import Entity
 from pygame_entities.utils.drawable import BaseSprite, SpriteWithCameraOffset
 from pygame_entities.utils.math import Vector2
+from pygame_entities.utils.noise import generate_levels
 
+import numpy as np
 import pygame
+import zlib
 from perlin_noise import PerlinNoise
 
 
 MAP_LAYER = -1000
 
+# Зарегистрированные классы тайлов. Индекс класса в списке - его ID
+registered_tiles: List[Type["Tile"]] = []
+
+
+def register_tile(tile_class):
+    """
+    Регистрирует класс тайла и выдает ему ID.
+
+    В чанках хранятся только ID тайлов, так что каждый используемый тайл должен быть зарегистрирован
+    """
+    if len(registered_tiles) > 255:
+        raise Exception("Too many tile classes, tile ID must fit in one byte.")
+
+    tile_class.ID = len(registered_tiles)
+    registered_tiles.append(tile_class)
+
+    return tile_class
+
 
 class Tile:
     """
     Базовый класс тайла
     """
     image: pygame.Surface = None
+    # Выдается в register_tile
+    ID: int = None
 
     @classmethod
     def get_image(cls) -> pygame.Surface:
@@ -44,6 +73,7 @@ class RandomVariatedTiles(Tile):
             return choice(cls.images)
 
 
+@register_tile
 class SandTile(RandomVariatedTiles):
     """Тайл песочка"""
     images = [Sprites.SAND_1, Sprites.SAND_2, Sprites.SAND_4,
@@ -52,6 +82,7 @@ class SandTile(RandomVariatedTiles):
     is_weighted = True
 
 
+@register_tile
 class GrassTile(RandomVariatedTiles):
     """Тайл травы"""  # где то тут снуп дог задумался о своем стартапе в айти
     images = [Sprites.GRASS_1, Sprites.GRASS_2,
@@ -60,26 +91,76 @@ class GrassTile(RandomVariatedTiles):
     is_weighted = True
 
 
+@register_tile
 class WaterTile(Tile):
     """Тайл воды"""
     image = Sprites.WATER
 
 
+# Непрозрачные копии картинок тайлов для запекания чанков, см. `get_opaque_tile_image`
+_opaque_tile_images: Dict[pygame.Surface, pygame.Surface] = dict()
+
+
+def _convert_for_display(surface: pygame.Surface) -> pygame.Surface:
+    """
+    Поверхность в формате экрана, что бы она рисовалась без преобразования пикселей.
+
+    Без окна (headless режим Game) формата экрана нет, поверхность остается как есть
+    """
+    display = pygame.display.get_surface()
+
+    # Новые поверхности без флагов и так создаются в формате экрана, тогда копировать их незачем
+    if display is None or (surface.get_bitsize(), surface.get_masks()) == (display.get_bitsize(), display.get_masks()):
+        return surface
+
+    return surface.convert()
+
+
+def get_opaque_tile_image(image: pygame.Surface) -> pygame.Surface:
+    """
+    Непрозрачная копия картинки тайла, нарисованная поверх цвета фона игры.
+
+    Карта рисуется под всем остальным поверх фона, поэтому выглядит так же,
+    а непрозрачные картинки рисуются в несколько раз быстрее
+    """
+    opaque_image = _opaque_tile_images.get(image)
+
+    if opaque_image is None:
+        opaque_image = pygame.Surface(image.get_size())
+        opaque_image.fill(Game.get_instance().void_color)
+        opaque_image.blit(image, (0, 0))
+        opaque_image = _opaque_tile_images[image] = _convert_for_display(
+            opaque_image)
+
+    return opaque_image
+
+
 class Chunk:
     """
     Чанк из тайлов. Используется сущностью Map
+
+    Тайлы хранятся в `tiles` как ID зарегистрированных тайлов, построчно, в одном массиве байтов
+
+    Если `is_baked=True`, то все тайлы чанка рисуются один раз на одну непрозрачную поверхность,
+    и чанк отображается одним спрайтом. Поверхность перерисовывается только после изменения тайлов,
+    спрятанный чанк ее не теряет, пока карта сама ее не освободит (см. `release_baked_surface`).
     """
 
-    def __init__(self, size: Tuple[int, int], default_tile: Tile, position: Vector2, tile_size: Tuple[int, int]) -> None:
+    def __init__(self, size: Tuple[int, int], default_tile: Tile, position: Vector2, tile_size: Tuple[int, int], is_baked=True) -> None:
         self.tile_size = tile_size
         self.game = Game.get_instance()
         self.position = position
         self.height = size[1]
         self.width = size[0]
-        self.tiles = [[default_tile for _ in range(
-            size[0])] for _ in range(size[1])]
+        self.tiles = array('B', [default_tile.ID]) * (size[0] * size[1])
         self.sprites: List[BaseSprite] = list()
-        self.is_hidden = False
+        # Чанк показывается картой, когда камера рядом с ним
+        self.is_hidden = True
+
+        self.is_baked = is_baked
+        self._baked_surface: pygame.Surface = None
+        # Сжатые тайлы для сохранения. Сбрасываются при изменении тайлов
+        self._saved_tiles: str = None
 
     def hide(self):
         """
@@ -92,9 +173,39 @@ class Chunk:
             sprite.kill()
 
         self.sprites = list()
-
         self.is_hidden = True
 
+    def release_baked_surface(self):
+        """
+        Освобождает запеченную поверхность спрятанного чанка, она будет запечена заново при показе
+        """
+        if self.is_hidden:
+            self._baked_surface = None
+
+    def bake(self):
+        """
+        Рисует все тайлы чанка на одну поверхность
+        """
+        surface = pygame.Surface(
+            (self.width * self.tile_size[0], self.height * self.tile_size[1]))
+        surface.fill(self.game.void_color)
+
+        blits = list()
+        for row in range(self.height):
+            for col in range(self.width):
+                tile_image = get_opaque_tile_image(
+                    registered_tiles[self.tiles[row * self.width + col]].get_image())
+
+                # Тайлы рисуются центром в своей позиции, как и отдельные спрайты
+                x = self.tile_size[0] * col + \
+                    (self.tile_size[0] - tile_image.get_width()) // 2
+                y = self.tile_size[1] * row + \
+                    (self.tile_size[1] - tile_image.get_height()) // 2
+                blits.append((tile_image, (x, y)))
+
+        surface.blits(blits, False)
+        self._baked_surface = _convert_for_display(surface)
+
     def render(self):
         """
         Рендерит все тайлы в чанке
@@ -103,9 +214,25 @@ class Chunk:
         if not self.is_hidden:
             return
 
+        if self.is_baked:
+            if self._baked_surface is None:
+                self.bake()
+
+            # Позиция чанка - это центр его первого тайла
+            x = self.position.x - self.tile_size[0] / \
+                2 + self._baked_surface.get_width() / 2
+            y = self.position.y - self.tile_size[1] / \
+                2 + self._baked_surface.get_height() / 2
+
+            self.sprites.append(SpriteWithCameraOffset(
+                self._baked_surface, MAP_LAYER, (int(x), int(y))))
+
+            self.is_hidden = False
+            return
+
         for row in range(self.height):
             for col in range(self.width):
-                tile = self.tiles[row][col]
+                tile = registered_tiles[self.tiles[row * self.width + col]]
 
                 tile_image = tile.get_image()
                 x = self.position.x + self.tile_size[0] * col
@@ -130,13 +257,38 @@ class Chunk:
         """
         Установить тайл в чанке. Координаты относительно чанка
         """
-        self.tiles[position[1]][position[0]] = tile
+        self.tiles[position[1] * self.width + position[0]] = tile.ID
+        self._baked_surface = None
+        self._saved_tiles = None
+
+    def set_tiles(self, tile_ids: bytes):
+        """
+        Установить сразу все тайлы чанка. Принимает ID тайлов построчно, по байту на тайл
+        """
+        if len(tile_ids) != self.width * self.height:
+            raise ValueError("Count of tiles does not match chunk size")
+
+        self.tiles = array('B', tile_ids)
+        self._baked_surface = None
+        self._saved_tiles = None
+
+    def get_saved_tiles(self) -> str:
+        """
+        Тайлы чанка для сохранения: сжатые zlib байты ID тайлов в base64.
+
+        Сжимаются только после изменения тайлов, поэтому сохранение карты почти ничего не стоит
+        """
+        if self._saved_tiles is None:
+            self._saved_tiles = b64encode(
+                zlib.compress(self.tiles.tobytes())).decode('ascii')
+
+        return self._saved_tiles
 
     def get_tile(self, position: Tuple[int, int]) -> Tile:
         """
         Получить тайл в чанке. Координаты относительно чанка
         """
-        return self.tiles[position[1]][position[0]]
+        return registered_tiles[self.tiles[position[1] * self.width + position[0]]]
 
     def get_center_position(self) -> Vector2:
         """
@@ -152,15 +304,29 @@ class MapBorder(CollisionMixin):
 
     def __init__(self, position: Vector2, collider_size: Vector2) -> None:
         super().__init__(position)
-        self.collision_init(collider_size)
+        self.collision_init(collider_size, is_static=True)
 
 
 @register_json
 class Map(Entity):
     """
     Сущность тайловой карты.
+
+    Чанки хранятся в `chunks` построчно одним списком. Чанк в колонке col и строке row - `chunks[row * map_size[0] + col]`
     """
-    RENDER_RADIUS = 3500
+    # На сколько пикселей за краями экрана показываются чанки, что бы они успевали показаться до того, как их видно
+    RENDER_MARGIN = 400
+    # Запекать ли тайлы чанков в одну поверхность
+    BAKE_CHUNKS = True
+    # Сколько спрятанных чанков держат запеченные поверхности (последние спрятанные),
+    # что бы не запекать их заново, когда камера возвращается. Поверхность чанка 10x10 весит около 10 МБ
+    BAKED_HIDDEN_CHUNKS = 4
+
+    # Сколько чанков максимум показывается и прячется за один кадр
+    CHUNKS_PER_FRAME = 2
+    # Сколько времени (в секундах) за кадр можно тратить на показ чанков.
+    # Хотя бы один чанк показывается каждый кадр, даже если он не влез в это время
+    CHUNKS_TIME_BUDGET = 0.004
 
     def __init__(self, position: Vector2, chunk_size: Tuple[int, int], map_size: Tuple[int, int], default_tile: Tile) -> None:
         super().__init__(position)
@@ -168,12 +334,8 @@ class Map(Entity):
         self.map_size = map_size
         self.tile_size = SPRITE_SIZE
         self.chunk_size = chunk_size
-        self.chunks = [[Chunk(chunk_size, default_tile, Vector2(
-            col * chunk_size[0] * self.tile_size[0], row * chunk_size[1] * self.tile_size[1]), self.tile_size) for col in range(map_size[0])] for row in range(map_size[1])]
-
-        for row in self.chunks:
-            for chunk in row:
-                chunk.reload()
+        self.chunks = [Chunk(chunk_size, default_tile, Vector2(
+            col * chunk_size[0] * self.tile_size[0], row * chunk_size[1] * self.tile_size[1]), self.tile_size, self.BAKE_CHUNKS) for row in range(map_size[1]) for col in range(map_size[0])]
 
         # Создание границ мира
         map_size: Vector2 = self.get_map_size()
@@ -186,6 +348,13 @@ class Map(Entity):
         self.bottom_border = MapBorder(
             Vector2(map_size.x / 2, map_size.y + map_size.y / 2 - SPRITE_SIZE[1]), map_size)
 
+        # Позиции (col, row) показанных чанков
+        self._shown_chunks = set()
+        # Позиции спрятанных чанков с запеченными поверхностями, от давно спрятанных к недавно спрятанным
+        self._baked_hidden_chunks: "OrderedDict[Tuple[int, int], None]" = OrderedDict()
+        # Индексы чанков, тайлы которых менялись через set_tile. Нужны для сохранения только изменений
+        self._changed_chunks = set()
+
         self.subscribe_on_update(self.render_chunks)
         self.subscribe_on_destroy(self.destroy_borders)
         self.subscribe_on_destroy(self.kill_all_tiles)
@@ -193,13 +362,73 @@ class Map(Entity):
     def render_chunks(self, delta_time: float):
         """
         Рендерит чанки в мире. Вызывается каждый кадр
+
+        Проверяются только чанки в окне вокруг камеры. Чанки показываются и прячутся постепенно,
+        не больше `CHUNKS_PER_FRAME` за кадр, ближайшие к камере показываются первыми.
+        """
+        chunks_to_render = self.get_chunks_in_view()
+
+        chunks_to_hide = [
+            pos for pos in self._shown_chunks if pos not in chunks_to_render]
+        for col, row in chunks_to_hide[:self.CHUNKS_PER_FRAME]:
+            self.get_chunk(col, row).hide()
+            self._shown_chunks.remove((col, row))
+            self._keep_baked_surface((col, row))
+
+        chunks_to_show = sorted(
+            (pos for pos in chunks_to_render if pos not in self._shown_chunks), key=chunks_to_render.get)
+
+        start_time = perf_counter()
+        for col, row in chunks_to_show[:self.CHUNKS_PER_FRAME]:
+            self.get_chunk(col, row).render()
+            self._shown_chunks.add((col, row))
+            self._baked_hidden_chunks.pop((col, row), None)
+
+            if perf_counter() - start_time > self.CHUNKS_TIME_BUDGET:
+                break
+
+    def _keep_baked_surface(self, chunk_position: Tuple[int, int]):
+        """
+        Оставляет запеченную поверхность спрятанного чанка, освобождая поверхности давно спрятанных чанков
+        """
+        self._baked_hidden_chunks[chunk_position] = None
+
+        while len(self._baked_hidden_chunks) > self.BAKED_HIDDEN_CHUNKS:
+            col, row = self._baked_hidden_chunks.popitem(last=False)[0]
+            self.get_chunk(col, row).release_baked_surface()
+
+    def get_chunks_in_view(self) -> Dict[Tuple[int, int], float]:
+        """
+        Позиции (col, row) чанков, которые видны на экране или ближе `RENDER_MARGIN` к его краям,
+        и расстояния от центра камеры до них.
+
+        Проверяются только чанки в прямоугольнике экрана, а не вся карта
         """
-        for row in self.chunks:
-            for chunk in row:
-                if (self.game.camera_center_position - chunk.get_center_position()).magnitude() > Map.RENDER_RADIUS:
-                    chunk.hide()
-                else:
-                    chunk.render()
+        camera_center = self.game.camera_center_position
+        screen_width, screen_height = self.game.screen_resolution
+        chunk_width = self.chunk_size[0] * self.tile_size[0]
+        chunk_height = self.chunk_size[1] * self.tile_size[1]
+
+        # Позиция чанка - центр его первого тайла, поэтому чанки начинаются на пол тайла левее и выше
+        left = camera_center.x - screen_width / 2 - \
+            Map.RENDER_MARGIN + self.tile_size[0] / 2
+        top = camera_center.y - screen_height / 2 - \
+            Map.RENDER_MARGIN + self.tile_size[1] / 2
+        right = left + screen_width + Map.RENDER_MARGIN * 2
+        bottom = top + screen_height + Map.RENDER_MARGIN * 2
+
+        min_col = max(int(left // chunk_width), 0)
+        max_col = min(int(right // chunk_width), self.map_size[0] - 1)
+        min_row = max(int(top // chunk_height), 0)
+        max_row = min(int(bottom // chunk_height), self.map_size[1] - 1)
+
+        chunks = dict()
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                chunks[(col, row)] = camera_center.distance_to(
+                    self.get_chunk(col, row).get_center_position())
+
+        return chunks
 
     def get_map_size_in_tiles(self) -> Tuple[int, int]:
         """
@@ -207,31 +436,44 @@ class Map(Entity):
         """
         return (self.map_size[0] * self.chunk_size[0], self.map_size[1] * self.chunk_size[1])
 
+    def get_chunk(self, col: int, row: int) -> Chunk:
+        """
+        Чанк в колонке col и строке row
+        """
+        return self.chunks[row * self.map_size[0] + col]
+
     def get_tile(self, tile_position: Tuple[int, int]) -> Tile:
         """
         Получить значение тайла. Принимаются абсолютные координаты
         """
-        chunk_x = tile_position[0] // self.chunk_size[0]
-        chunk_y = tile_position[1] // self.chunk_size[1]
+        chunk_x, tile_x = divmod(tile_position[0], self.chunk_size[0])
+        chunk_y, tile_y = divmod(tile_position[1], self.chunk_size[1])
 
-        tile_x = tile_position[0] - chunk_x * self.chunk_size[0]
-        tile_y = tile_position[1] - chunk_y * self.chunk_size[1]
-
-        return self.chunks[chunk_y][chunk_x].get_tile((tile_x, tile_y))
+        chunk = self.chunks[chunk_y * self.map_size[0] + chunk_x]
+        return registered_tiles[chunk.tiles[tile_y * self.chunk_size[0] + tile_x]]
 
     def set_tile(self, tile_position: Tuple[int, int], new_tile, reload=True):
         """
         Установить значение для тайла. Принимаются абсолютные координаты
         """
-        chunk_x = tile_position[0] // self.chunk_size[0]
-        chunk_y = tile_position[1] // self.chunk_size[1]
-
-        tile_x = tile_position[0] - chunk_x * self.chunk_size[0]
-        tile_y = tile_position[1] - chunk_y * self.chunk_size[1]
+        chunk_x, tile_x = divmod(tile_position[0], self.chunk_size[0])
+        chunk_y, tile_y = divmod(tile_position[1], self.chunk_size[1])
 
-        self.chunks[chunk_y][chunk_x].set_tile((tile_x, tile_y), new_tile)
+        chunk_index = chunk_y * self.map_size[0] + chunk_x
+        chunk = self.chunks[chunk_index]
+        chunk.set_tile((tile_x, tile_y), new_tile)
+        self._changed_chunks.add(chunk_index)
         if reload:
-            self.chunks[chunk_y][chunk_x].reload()
+            chunk.reload()
+
+    def pop_changed_chunks(self) -> List[int]:
+        """
+        Индексы чанков, измененных с прошлого вызова
+        """
+        changed_chunks = sorted(self._changed_chunks)
+        self._changed_chunks.clear()
+
+        return changed_chunks
 
     def get_map_size(self) -> Vector2:
         """
@@ -256,31 +498,141 @@ class Map(Entity):
         self.bottom_border.destroy()
 
     def kill_all_tiles(self):
-        for row in self.chunks:
-            for chunk in row:
-                [el.kill() for el in chunk.sprites]
+        for chunk in self.chunks:
+            [el.kill() for el in chunk.sprites]
 
     def to_json(self) -> dict:
-        return {'type': self.__class__.__name__, 'position': self.position.get_tuple(), 'chunk_size': self.chunk_size, 'map_size': self.map_size}
+        """
+        Тайлы сохраняются для каждого чанка как сжатые zlib байты ID тайлов в base64.
+        Вместе с ними сохраняются имена классов тайлов, что бы ID можно было восстановить,
+        даже если порядок регистрации тайлов поменялся
+        """
+        return {
+            'type': self.__class__.__name__,
+            'position': self.position.get_tuple(),
+            'chunk_size': self.chunk_size,
+            'map_size': self.map_size,
+            'tile_types': [tile.__name__ for tile in registered_tiles],
+            'chunks': [chunk.get_saved_tiles() for chunk in self.chunks]
+        }
 
     @classmethod
     def from_json(cls, json_dict: dict) -> "Map":
         new_map = cls(Vector2.from_tuple(
             json_dict['position']), json_dict['chunk_size'], json_dict['map_size'], SandTile)
 
-        fill_map(new_map, 0)
+        # Старые сохранения без тайлов
+        if 'chunks' not in json_dict:
+            fill_map(new_map, 0)
+            return new_map
+
+        tiles_by_name = {tile.__name__: tile for tile in registered_tiles}
+        ids_table = bytearray(range(256))
+        for saved_id, tile_name in enumerate(json_dict['tile_types']):
+            ids_table[saved_id] = tiles_by_name[tile_name].ID
+
+        for chunk, chunk_data in zip(new_map.chunks, json_dict['chunks']):
+            chunk.set_tiles(zlib.decompress(
+                b64decode(chunk_data)).translate(ids_table))
+
         return new_map
 
 
-def fill_map(map: Map, seed: int, noise_multiplier=0.1):
+# Тут мы указываем тайлы, используемые в генерации.
+# Тайлы идут от самого низкого, до самого высокого
+# Можно вставлять тайлы когда захочется, в алгоритме нет привязки именно к 3 тайлам.
+FLOOR_TILES = [WaterTile, SandTile, GrassTile]
+
+# Параметры шума для векторизованной генерации
+TERRAIN_NOISE_FREQUENCY = 2
+TERRAIN_NOISE_OCTAVES = 2
+TERRAIN_HEIGHT_OFFSET = 0.6
+
+
+def _get_levels_generator(seed: int, noise_multiplier: float):
+    # Функция из pygame_entities.utils.noise, что бы процессам для генерации был нужен только NumPy
+    return partial(
+        generate_levels,
+        seed,
+        scale=noise_multiplier,
+        offset=TERRAIN_HEIGHT_OFFSET,
+        levels=len(FLOOR_TILES),
+        frequency=TERRAIN_NOISE_FREQUENCY,
+        octaves=TERRAIN_NOISE_OCTAVES
+    )
+
+
+def generate_tile_indexes(seed: int, origin: Tuple[int, int], size: Tuple[int, int], noise_multiplier=0.1) -> np.ndarray:
+    """
+    Генерирует индексы тайлов из `FLOOR_TILES` для прямоугольника карты.
+
+    origin - координаты левого верхнего тайла, size - размер прямоугольника в тайлах.
+    Возвращает массив uint8 размером (size[1], size[0]).
+    Значение тайла зависит только от его координат и сида, а не от прямоугольника
+    """
+    return _get_levels_generator(seed, noise_multiplier)(origin, size)
+
+
+def generate_chunks_tile_indexes(seed: int, map_size: Tuple[int, int], chunk_size: Tuple[int, int],
+                                 noise_multiplier=0.1, workers=1) -> List[np.ndarray]:
+    """
+    Генерирует индексы тайлов из `FLOOR_TILES` для каждого чанка карты, в порядке `Map.chunks`.
+
+    Если `workers > 1`, то карта делится на задачи из целых чанков (полосы строк чанков),
+    которые генерируются в отдельных процессах.
+    Шум для многих чанков разом считается NumPy намного быстрее, чем для каждого чанка отдельно,
+    поэтому задач всего в несколько раз больше, чем процессов. Результат такой же, как в одном процессе
+    """
+    chunk_width, chunk_height = chunk_size
+    map_width = map_size[0] * chunk_width
+
+    rows_per_job = map_size[1]
+    if workers > 1:
+        rows_per_job = max(map_size[1] // (workers * 4), 1)
+
+    origins = [(0, row * chunk_height)
+               for row in range(0, map_size[1], rows_per_job)]
+    sizes = [(map_width, min(rows_per_job, map_size[1] - row) * chunk_height)
+             for row in range(0, map_size[1], rows_per_job)]
+    generate = _get_levels_generator(seed, noise_multiplier)
+
+    if len(origins) <= 1:
+        strips = [generate(origin, size) for origin, size in zip(origins, sizes)]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            strips = list(executor.map(generate, origins, sizes))
+
+    return [strip[y:y + chunk_height, x:x + chunk_width]
+            for strip in strips
+            for y in range(0, strip.shape[0], chunk_height)
+            for x in range(0, map_width, chunk_width)]
+
+
+def fill_map(map: Map, seed: int, noise_multiplier=0.1, vectorized=True, workers=1):
     """
     Заполняет всю карту рандомно по каким-то условиям.
+
+    Если `vectorized=True`, то шум для всей карты считается разом через NumPy,
+    и тайлы записываются сразу в чанки. Иначе используется медленный шум из perlin_noise.
+
+    workers - количество процессов для генерации шума (только для `vectorized=True`)
     """
+    floor_tiles = FLOOR_TILES
 
-    # Тут мы указываем тайлы, используемые в генерации.
-    # Тайлы идут от самого низкого, до самого высокого
-    # Можно вставлять тайлы когда захочется, в алгоритме нет привязки именно к 3 тайлам.
-    floor_tiles = [WaterTile, SandTile, GrassTile]
+    if vectorized:
+        chunks_tile_indexes = generate_chunks_tile_indexes(
+            seed, map.map_size, map.chunk_size, noise_multiplier, workers)
+
+        # Индексы тайлов из floor_tiles переводятся в ID тайлов
+        ids_table = bytearray(range(256))
+        for index, tile in enumerate(floor_tiles):
+            ids_table[index] = tile.ID
+
+        for chunk, tile_indexes in zip(map.chunks, chunks_tile_indexes):
+            chunk.set_tiles(tile_indexes.tobytes().translate(ids_table))
+            chunk.reload()
+
+        return
 
     map_center = Vector2(map.get_map_size_in_tiles()[
         0], map.get_map_size_in_tiles()[1]) / 2
@@ -312,6 +664,5 @@ def fill_map(map: Map, seed: int, noise_multiplier=0.1):
             map.set_tile((x, y), floor_tiles[tile_index], False)
 
     # Перезагрузка всех чанков
-    for row in map.chunks:
-        for chunk in row:
-            chunk.reload()
+    for chunk in map.chunks:
+        chunk.reload()
@@ -42,6 +42,9 @@ class Player(LivingEntity, OnMapSpriteMixin, BlockingCollisionMixin, VelocityMix
 
     ITEMS_PICKUP_RADIUS = 128
 
+    # Позиция и инвентарь игрока меняются постоянно, поэтому он проверяется при каждом сохранении
+    IS_ALWAYS_DIRTY = True
+
     def __init__(self, position: Vector2) -> None:
         super().__init__(position, self.DEFAULT_HP)
         self.set_speed(self.DEFAULT_SPEED)
@@ -86,7 +89,7 @@ class Player(LivingEntity, OnMapSpriteMixin, BlockingCollisionMixin, VelocityMix
         if keys[pygame.K_s]:
             direction.y += 1
 
-        self.velocity = direction.normalized() * self.speed * delta_time
+        self.velocity = direction.normalized() * self.speed
 
     def keys_handler(self, event: pygame.event.Event):
         if event.key == pygame.K_f:
@@ -119,10 +122,7 @@ class Player(LivingEntity, OnMapSpriteMixin, BlockingCollisionMixin, VelocityMix
             self.inventory_panel.render()
 
     def pickup_nearest_items(self):
-        for ent in self.game.enabled_entities:
-            if not type(ent) == ItemEntity or (ent.position - self.position).magnitude() > self.ITEMS_PICKUP_RADIUS:
-                continue
-
+        for ent in self.game.query_radius(self.position, self.ITEMS_PICKUP_RADIUS, ItemEntity):
             ent: ItemEntity
             ent.item = self.inventory.add_item(ent.item)
 
@@ -145,7 +145,7 @@ class Player(LivingEntity, OnMapSpriteMixin, BlockingCollisionMixin, VelocityMix
         mouse_pos = self.game.from_screen_to_world_point(
             Vector2.from_tuple(pygame.mouse.get_pos())).get_tuple()
 
-        for building in filter(lambda x: isinstance(x, Building), self.game.enabled_entities):
+        for building in self.game.get_entities_of_type(Building):
             building: Building
 
             if building.collider_rect.collidepoint(mouse_pos) and building.IS_USABLE:
@@ -0,0 +1,205 @@
+"""
+Ленивая загрузка сущностей по регионам мира.
+
+Мир делится на квадратные регионы. Сущности в регионах далеко от камеры "засыпают":
+от них остается только запись (`to_json()`), а сама сущность со спрайтом, коллайдером и системой частиц удаляется.
+Когда камера подходит к региону, сущности создаются из записей снова.
+Поэтому количество живых сущностей зависит от радиуса вокруг камеры, а не от размера острова.
+"""
+from functools import partial
+from typing import Dict, Iterator, List, Tuple
+
+from entities.building import Building
+from entities.item import ItemEntity
+from entities.json_parser import json_dict_into_object, registered_classes
+from pygame_entities.entities.entity import Entity
+from pygame_entities.utils.math import Vector2
+
+
+class SleepingRecord:
+    """
+    Запись спящей сущности.
+
+    `key` - ключ сущности в сохранении, его выставляет `SaveChangesTracker`. None, если сущность еще не сохранялась
+    """
+    __slots__ = ('record', 'key')
+
+    def __init__(self, record: dict, key: int = None) -> None:
+        self.record = record
+        self.key = key
+
+
+class RegionStreamer(Entity):
+    """
+    Сущность, которая усыпляет и будит сущности `STREAMED_TYPES` по регионам вокруг камеры.
+
+    Регион будится, когда его центр ближе `WAKE_RADIUS` к центру камеры, и засыпает, когда дальше `SLEEP_RADIUS`.
+    За кадр будится и усыпляется не больше `REGIONS_PER_FRAME` регионов
+    """
+    # Размер региона в пикселях
+    REGION_SIZE = 1024
+    WAKE_RADIUS = 2500
+    # Больше WAKE_RADIUS, что бы регионы на границе не засыпали и не просыпались постоянно
+    SLEEP_RADIUS = 3500
+    REGIONS_PER_FRAME = 1
+    # Как часто (в секундах) искать живые сущности в далеких регионах
+    SLEEP_CHECK_INTERVAL = 1
+
+    STREAMED_TYPES = (Building, ItemEntity)
+
+    def __init__(self) -> None:
+        super().__init__(Vector2(0, 0))
+
+        self._sleeping: Dict[Tuple[int, int], List[SleepingRecord]] = dict()
+        # Сущности, заснувшие с прошлого сохранения
+        self._slept_records: List[SleepingRecord] = list()
+        # Проснувшиеся сущности, которые потом были удалены (не заснули)
+        self._destroyed_records: List[SleepingRecord] = list()
+        self._time_to_sleep_check = 0
+
+        self.subscribe_on_update(self.update_regions)
+
+    @classmethod
+    def is_streamed_record(cls, record: dict) -> bool:
+        return issubclass(registered_classes[record['type']], cls.STREAMED_TYPES)
+
+    def get_region(self, position: Vector2) -> Tuple[int, int]:
+        return (int(position.x // self.REGION_SIZE), int(position.y // self.REGION_SIZE))
+
+    def get_region_distance(self, region: Tuple[int, int], point: Vector2 = None) -> float:
+        """
+        Расстояние от центра региона до точки (по умолчанию до центра камеры)
+        """
+        if point is None:
+            point = self.game.camera_center_position
+
+        center = Vector2((region[0] + 0.5) * self.REGION_SIZE,
+                         (region[1] + 0.5) * self.REGION_SIZE)
+        return center.distance_to(point)
+
+    def add_record(self, record: dict) -> SleepingRecord:
+        """
+        Добавляет запись спящей сущности. Сущность создастся, когда камера подойдет к ее региону
+        """
+        sleeping_record = SleepingRecord(record)
+        self._add_sleeping_record(sleeping_record)
+
+        return sleeping_record
+
+    def _add_sleeping_record(self, sleeping_record: SleepingRecord):
+        region = self.get_region(
+            Vector2.from_tuple(sleeping_record.record['position']))
+        self._sleeping.setdefault(region, list()).append(sleeping_record)
+
+    def get_sleeping_records(self) -> Iterator[SleepingRecord]:
+        for records in self._sleeping.values():
+            yield from records
+
+    def pop_slept_records(self) -> List[SleepingRecord]:
+        """
+        Записи сущностей, заснувших с прошлого вызова. Нужны трекеру сохранения
+        """
+        slept_records = self._slept_records
+        self._slept_records = list()
+
+        return slept_records
+
+    def pop_destroyed_records(self) -> List[SleepingRecord]:
+        """
+        Записи проснувшихся сущностей, удаленных с прошлого вызова. Нужны трекеру сохранения
+        """
+        destroyed_records = self._destroyed_records
+        self._destroyed_records = list()
+
+        return destroyed_records
+
+    @property
+    def sleeping_count(self) -> int:
+        return sum(len(records) for records in self._sleeping.values())
+
+    def update_regions(self, delta_time: float):
+        self.wake_near_regions()
+
+        self._time_to_sleep_check -= delta_time
+        if self._time_to_sleep_check <= 0:
+            self._time_to_sleep_check = self.SLEEP_CHECK_INTERVAL
+            self.sleep_far_regions()
+
+    def wake_near_regions(self, center: Vector2 = None, max_regions: int = REGIONS_PER_FRAME):
+        """
+        Будит ближайшие к `center` (по умолчанию к центру камеры) спящие регионы в радиусе `WAKE_RADIUS`.
+
+        Будится не больше `max_regions` регионов, если `max_regions` не None
+        """
+        if center is None:
+            center = self.game.camera_center_position
+
+        min_col, min_row = self.get_region(
+            center - Vector2(self.WAKE_RADIUS, self.WAKE_RADIUS))
+        max_col, max_row = self.get_region(
+            center + Vector2(self.WAKE_RADIUS, self.WAKE_RADIUS))
+
+        regions_to_wake = list()
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                if (col, row) not in self._sleeping:
+                    continue
+
+                distance = self.get_region_distance((col, row), center)
+                if distance <= self.WAKE_RADIUS:
+                    regions_to_wake.append((distance, (col, row)))
+
+        regions_to_wake.sort()
+        for _, region in regions_to_wake[:max_regions]:
+            self.wake_region(region)
+
+    def wake_region(self, region: Tuple[int, int]):
+        for sleeping_record in self._sleeping.pop(region, list()):
+            entity = json_dict_into_object(sleeping_record.record)
+            # По этой записи трекер сохранения узнает ключ сущности, а при засыпании запись переиспользуется
+            entity.woken_from = sleeping_record
+            entity.subscribe_on_destroy(
+                partial(self._on_woken_entity_destroyed, entity))
+
+    def _on_woken_entity_destroyed(self, entity: Entity):
+        if getattr(entity, "sleeping_record", None) is None:
+            self._destroyed_records.append(entity.woken_from)
+
+    def sleep_far_regions(self):
+        """
+        Усыпляет сущности в регионах дальше `SLEEP_RADIUS` от камеры
+        """
+        far_regions: Dict[Tuple[int, int], List[Entity]] = dict()
+
+        for streamed_type in self.STREAMED_TYPES:
+            for entity in self.game.get_entities_of_type(streamed_type):
+                region = self.get_region(entity.position)
+
+                if region in far_regions:
+                    far_regions[region].append(entity)
+                elif self.get_region_distance(region) > self.SLEEP_RADIUS:
+                    far_regions[region] = [entity]
+
+        regions = sorted(far_regions.keys(), key=self.get_region_distance,
+                         reverse=True)
+        for region in regions[:self.REGIONS_PER_FRAME]:
+            for entity in far_regions[region]:
+                self.sleep_entity(entity)
+
+        # Остальные регионы усыпятся в следующих кадрах
+        if len(regions) > self.REGIONS_PER_FRAME:
+            self._time_to_sleep_check = 0
+
+    def sleep_entity(self, entity: Entity):
+        sleeping_record = getattr(entity, "woken_from", None)
+        if sleeping_record is None:
+            sleeping_record = SleepingRecord(None)
+
+        sleeping_record.record = entity.to_json()
+
+        # Трекер сохранения по этому полю понимает, что сущность не удалена, а заснула
+        entity.sleeping_record = sleeping_record
+        entity.destroy()
+
+        self._slept_records.append(sleeping_record)
+        self._add_sleeping_record(sleeping_record)
@@ -0,0 +1,315 @@
+"""
+Бинарный формат сохранений.
+
+Файл начинается с `SAVE_HEADER`, дальше идут записи сущностей одна за другой.
+Каждая запись - это длина (uint32) и словарь из `to_json()` сущности, закодированный в бинарный формат,
+похожий на msgpack. Поэтому сохранение пишется и читается по одной сущности, без одной огромной строки в памяти.
+
+Файл может быть сжат gzip целиком, это определяется при чтении.
+Старые сохранения в JSON тоже читаются.
+"""
+import gzip
+import json
+import os
+import struct
+from typing import Iterable, Iterator, List, Tuple
+
+from entities.json_parser import registered_classes
+
+SAVE_HEADER = b"SANEKSAVE\x01"
+# Суффиксы служебных файлов рядом с сохранением: временные файлы записи и журнал изменений (см. save_journal)
+SERVICE_FILE_SUFFIXES = (".tmp", ".journal")
+_GZIP_MAGIC = b"\x1f\x8b"
+
+_LENGTH = struct.Struct("<I")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+_NONE = b"N"
+_TRUE = b"T"
+_FALSE = b"F"
+_INT_TAG = b"i"
+_FLOAT_TAG = b"d"
+_STR_TAG = b"s"
+_BYTES_TAG = b"b"
+_LIST_TAG = b"l"
+_DICT_TAG = b"m"
+
+
+def encode_value(value, out: bytearray):
+    """
+    Кодирует значение в конец `out`.
+
+    Поддерживаются None, bool, int, float, str, bytes, list, tuple (читается как list) и dict со строковыми ключами
+    """
+    if value is None:
+        out += _NONE
+    elif value is True:
+        out += _TRUE
+    elif value is False:
+        out += _FALSE
+    elif isinstance(value, int):
+        out += _INT_TAG
+        out += _INT.pack(value)
+    elif isinstance(value, float):
+        out += _FLOAT_TAG
+        out += _FLOAT.pack(value)
+    elif isinstance(value, str):
+        encoded = value.encode('utf-8')
+        out += _STR_TAG
+        out += _LENGTH.pack(len(encoded))
+        out += encoded
+    elif isinstance(value, (bytes, bytearray)):
+        out += _BYTES_TAG
+        out += _LENGTH.pack(len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out += _LIST_TAG
+        out += _LENGTH.pack(len(value))
+        for item in value:
+            encode_value(item, out)
+    elif isinstance(value, dict):
+        out += _DICT_TAG
+        out += _LENGTH.pack(len(value))
+        for key, item in value.items():
+            encode_value(key, out)
+            encode_value(item, out)
+    else:
+        raise TypeError(f"Can not save value of type {type(value).__name__}")
+
+
+def decode_value(data: bytes, offset: int = 0) -> Tuple[object, int]:
+    """
+    Декодирует значение из `data`, начиная с `offset`.
+
+    Возвращает значение и смещение сразу после него
+    """
+    tag = data[offset:offset + 1]
+    offset += 1
+
+    if tag == _NONE:
+        return None, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _INT_TAG:
+        return _INT.unpack_from(data, offset)[0], offset + _INT.size
+    if tag == _FLOAT_TAG:
+        return _FLOAT.unpack_from(data, offset)[0], offset + _FLOAT.size
+
+    length = _LENGTH.unpack_from(data, offset)[0]
+    offset += _LENGTH.size
+
+    if tag == _STR_TAG:
+        return str(data[offset:offset + length], 'utf-8'), offset + length
+    if tag == _BYTES_TAG:
+        return bytes(data[offset:offset + length]), offset + length
+    if tag == _LIST_TAG:
+        items = []
+        for _ in range(length):
+            item, offset = decode_value(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == _DICT_TAG:
+        items = {}
+        for _ in range(length):
+            key, offset = decode_value(data, offset)
+            items[key], offset = decode_value(data, offset)
+        return items, offset
+
+    raise ValueError(f"Unknown value tag {tag} in save")
+
+
+def encode_record(record: dict, buffer: bytearray = None) -> bytearray:
+    """
+    Кодирует запись вместе с ее длиной, как она лежит в файле.
+
+    Если передан `buffer`, то запись кодируется в него (старое содержимое стирается)
+    """
+    if buffer is None:
+        buffer = bytearray()
+
+    del buffer[:]
+    buffer += b"\0" * _LENGTH.size
+    encode_value(record, buffer)
+    _LENGTH.pack_into(buffer, 0, len(buffer) - _LENGTH.size)
+
+    return buffer
+
+
+class SaveWriter:
+    """
+    Пишет записи в файл сохранения по одной.
+
+    Запись идет во временный файл, который заменяет файл сохранения только в `close()`,
+    поэтому недописанное сохранение не портит старое.
+
+    `compress` - сжимать ли файл gzip, `backups` - сколько прошлых сохранений хранить
+    рядом как `path.1`, `path.2`, ... (`path.1` - самое новое)
+
+    Можно использовать как контекстный менеджер
+    """
+
+    # Уровень сжатия gzip. Быстрое сжатие, потому что данные карты уже сжаты
+    COMPRESS_LEVEL = 1
+
+    def __init__(self, path: str, compress=False, backups=0) -> None:
+        self.path = path
+        self.backups = backups
+        self._temp_path = f"{path}.tmp"
+        self._raw_file = open(self._temp_path, 'wb')
+        self._file = self._raw_file
+
+        if compress:
+            self._file = gzip.GzipFile(
+                fileobj=self._raw_file, mode='wb', compresslevel=self.COMPRESS_LEVEL)
+
+        self._file.write(SAVE_HEADER)
+        self._buffer = bytearray()
+
+    def write(self, record: dict):
+        """
+        Кодирует и дописывает одну запись
+        """
+        self._file.write(encode_record(record, self._buffer))
+
+    def close(self):
+        """
+        Дописывает файл и заменяет им старое сохранение
+        """
+        if self._file is not self._raw_file:
+            self._file.close()
+
+        self._raw_file.flush()
+        os.fsync(self._raw_file.fileno())
+        self._raw_file.close()
+
+        rotate_backups(self.path, self.backups)
+        os.replace(self._temp_path, self.path)
+
+    def abort(self):
+        """
+        Удаляет недописанный файл, старое сохранение остается
+        """
+        self._raw_file.close()
+        os.remove(self._temp_path)
+
+    def __enter__(self) -> "SaveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def list_saves(folder: str) -> List[str]:
+    """
+    Имена файлов сохранений в папке, без резервных копий (`path.1`, `path.2`, ...), журналов и временных файлов
+    """
+    names = set(os.listdir(folder))
+    saves = list()
+
+    for name in names:
+        if name.endswith(SERVICE_FILE_SUFFIXES):
+            continue
+
+        base_name, _, suffix = name.rpartition('.')
+        if suffix.isdigit() and base_name in names:
+            continue
+
+        saves.append(name)
+
+    return sorted(saves)
+
+
+def iter_entity_records(entities: Iterable) -> Iterator[dict]:
+    """
+    Записи (`to_json()`) сущностей, классы которых зарегистрированы через `register_json`
+    """
+    for ent in entities:
+        if ent.__class__.__name__ not in registered_classes.keys():
+            continue
+
+        yield ent.to_json()
+
+
+def rotate_backups(path: str, count: int):
+    """
+    Сдвигает резервные копии сохранения: `path.1` становится `path.2` и т.д., сохранение становится `path.1`.
+
+    Копии старше `count` перезаписываются
+    """
+    if count <= 0 or not os.path.exists(path):
+        return
+
+    for index in range(count - 1, 0, -1):
+        if os.path.exists(f"{path}.{index}"):
+            os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+
+    os.replace(path, f"{path}.1")
+
+
+def write_save(path: str, records: Iterable[dict], compress=False, backups=0):
+    """
+    Записывает все записи в файл сохранения
+    """
+    with SaveWriter(path, compress, backups) as writer:
+        for record in records:
+            writer.write(record)
+
+
+def read_save(path: str) -> Iterator[dict]:
+    """
+    Читает записи из файла сохранения по одной.
+
+    Сжатый gzip файл распаковывается по ходу чтения.
+    Если файл в старом формате JSON, то он читается целиком, и записи берутся из него
+    """
+    with open(path, 'rb') as raw_file:
+        if raw_file.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC:
+            raw_file.seek(0)
+            with gzip.GzipFile(fileobj=raw_file, mode='rb') as f:
+                yield from _read_records(f)
+        else:
+            raw_file.seek(0)
+            yield from _read_records(raw_file)
+
+
+def _read_records(f) -> Iterator[dict]:
+    header = f.read(len(SAVE_HEADER))
+
+    if header != SAVE_HEADER:
+        f.seek(0)
+        yield from json.loads(f.read().decode('utf-8'))['entities']
+        return
+
+    yield from iter_records(f)
+
+
+def iter_records(f, allow_truncated=False) -> Iterator[dict]:
+    """
+    Читает записи из открытого файла, начиная с текущей позиции, до конца файла.
+
+    Если `allow_truncated=True`, то недописанная последняя запись пропускается, а не вызывает ошибку
+    """
+    while True:
+        length_bytes = f.read(_LENGTH.size)
+        if not length_bytes:
+            return
+
+        if len(length_bytes) < _LENGTH.size:
+            if allow_truncated:
+                return
+            raise ValueError("Save file is truncated")
+
+        length = _LENGTH.unpack(length_bytes)[0]
+        data = f.read(length)
+        if len(data) < length:
+            if allow_truncated:
+                return
+            raise ValueError("Save file is truncated")
+
+        yield decode_value(data)[0]
@@ -0,0 +1,372 @@
+"""
+Сохранение только изменений мира.
+
+Сохранение состоит из базового снимка (обычного файла сохранения, см. `save_file`) и журнала `<сохранение>.journal`,
+в конец которого дописываются изменения: созданные, удаленные и измененные сущности и измененные чанки карты.
+Поэтому сохранение стоит столько, сколько изменилось, а не сколько всего сущностей в мире.
+
+Сущности в снимке нумеруются ключами по порядку записей, новые сущности получают следующие ключи.
+Первая запись снимка - `SAVE_INFO_TYPE` с меткой снимка, журнал начинается с той же метки.
+Журнал от другого снимка (например, если запись снимка прервалась) игнорируется.
+
+Когда журнал становится большим, мир записывается новым снимком, а журнал очищается (компактизация).
+"""
+import os
+from random import getrandbits
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Set
+from weakref import WeakSet
+
+from entities.json_parser import registered_classes
+from entities.map import Map
+from entities.save_file import encode_record, iter_records, read_save, write_save
+from pygame_entities.entities.entity import Entity
+from pygame_entities.game import Game
+
+if TYPE_CHECKING:
+    from entities.regions import RegionStreamer
+
+JOURNAL_HEADER = b"SANEKJRNL\x01"
+SAVE_INFO_TYPE = "SaveInfo"
+
+# Трекеры, которые сейчас следят за миром, см. `mark_dirty`
+_trackers: "WeakSet[SaveChangesTracker]" = WeakSet()
+
+
+def mark_dirty(entity: Entity):
+    """
+    Помечает сущность измененной, что бы она попала в следующее сохранение изменений.
+
+    Сущности с `IS_ALWAYS_DIRTY = True` помечать не нужно, они проверяются при каждом сохранении
+    """
+    for tracker in _trackers:
+        tracker.mark_dirty(entity)
+
+
+def get_journal_path(path: str) -> str:
+    return f"{path}.journal"
+
+
+def write_snapshot(path: str, token: int, records: Iterable[dict], compress=False, backups=0):
+    """
+    Записывает базовый снимок с меткой `token` и начинает для него пустой журнал
+    """
+    def records_with_info():
+        yield {'type': SAVE_INFO_TYPE, 'token': token}
+        yield from records
+
+    write_save(path, records_with_info(), compress, backups)
+
+    journal_path = get_journal_path(path)
+    with open(f"{journal_path}.tmp", 'wb') as f:
+        f.write(JOURNAL_HEADER)
+        f.write(encode_record({'token': token}))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(f"{journal_path}.tmp", journal_path)
+
+
+def append_journal(path: str, changes: List[dict]):
+    """
+    Дописывает изменения в конец журнала
+    """
+    buffer = bytearray()
+
+    with open(get_journal_path(path), 'ab') as f:
+        for change in changes:
+            f.write(encode_record(change, buffer))
+
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_journal(path: str, token: int) -> List[dict]:
+    journal_path = get_journal_path(path)
+
+    if token is None or not os.path.exists(journal_path):
+        return []
+
+    with open(journal_path, 'rb') as f:
+        if f.read(len(JOURNAL_HEADER)) != JOURNAL_HEADER:
+            return []
+
+        # Недописанное последнее изменение (например, игра упала во время записи) пропускается
+        records = iter_records(f, allow_truncated=True)
+        info = next(records, None)
+
+        if info is None or info['token'] != token:
+            return []
+
+        return list(records)
+
+
+def load_save(path: str) -> Iterator[dict]:
+    """
+    Читает записи сущностей из снимка с примененным журналом.
+
+    Журнал небольшой, поэтому он читается заранее, а снимок читается по одной записи, как в `read_save`
+    """
+    records = read_save(path)
+    first_record = next(records, None)
+
+    if first_record is None:
+        return
+
+    token = None
+    if first_record['type'] == SAVE_INFO_TYPE:
+        token = first_record['token']
+    else:
+        # Сохранение без журнала
+        yield first_record
+        yield from records
+        return
+
+    changed: Dict[int, dict] = dict()
+    deleted: Set[int] = set()
+    changed_chunks: Dict[int, Dict[int, str]] = dict()
+
+    for change in _read_journal(path, token):
+        key = change['key']
+
+        if change['op'] == 'put':
+            changed[key] = change['record']
+        elif change['op'] == 'delete':
+            changed.pop(key, None)
+            deleted.add(key)
+        elif change['op'] == 'chunk':
+            changed_chunks.setdefault(key, dict())[
+                change['index']] = change['tiles']
+
+    for key, record in enumerate(records):
+        if key in deleted:
+            continue
+
+        record = changed.pop(key, record)
+
+        for index, tiles in changed_chunks.get(key, dict()).items():
+            record['chunks'][index] = tiles
+
+        yield record
+
+    # Сущности, созданные после снимка
+    for key in sorted(changed.keys()):
+        yield changed[key]
+
+
+def _is_same_record(record: dict, other_record: dict) -> bool:
+    if record == other_record:
+        return True
+
+    # Записи из файла содержат списки вместо кортежей, поэтому сравниваются закодированными
+    return encode_record(record) == encode_record(other_record)
+
+
+class SaveChangesTracker:
+    """
+    Следит за изменениями сохраняемых сущностей мира.
+
+    `snapshot()` возвращает записи всех сущностей для снимка,
+    `collect_changes()` - изменения с прошлого вызова для журнала.
+
+    Новые сущности находятся по ID (ID в игре только растут), удаленные - через подписку на `destroy()`,
+    измененные - через `mark_dirty()` и `IS_ALWAYS_DIRTY`.
+    Запись измененной сущности сравнивается с сохраненной, поэтому неизмененные сущности в журнал не попадают.
+
+    Если передан `streamer`, то спящие сущности (см. `regions`) тоже сохраняются,
+    а засыпание и пробуждение сущностей не считаются удалением и созданием
+    """
+
+    def __init__(self, streamer: "RegionStreamer" = None) -> None:
+        self.game = Game.get_instance()
+        self.streamer = streamer
+
+        self.token: int = None
+        # ID сущности в игре -> ключ в сохранении
+        self._keys: Dict[int, int] = dict()
+        # Ключ -> последняя сохраненная запись (для карт не хранится, у них сохраняются только чанки)
+        self._records: Dict[int, dict] = dict()
+        self._always_dirty: Dict[int, Entity] = dict()
+        # Сохраненные сущности, помеченные `mark_dirty()` с прошлого сохранения
+        self._dirty: Dict[int, Entity] = dict()
+        self._deleted_keys: List[int] = list()
+        self._next_key = 0
+        self._last_entity_id = -1
+
+        _trackers.add(self)
+
+    def close(self):
+        """
+        Перестает следить за изменениями сущностей
+        """
+        _trackers.discard(self)
+        self._dirty = dict()
+
+    def mark_dirty(self, entity: Entity):
+        # Новые сущности и так сохранятся целиком, а удаленные не должны оставаться в памяти
+        if self._keys.get(entity.id) is not None:
+            self._dirty[entity.id] = entity
+
+    def _is_saved(self, entity: Entity) -> bool:
+        return entity.__class__.__name__ in registered_classes.keys()
+
+    def _get_new_key(self) -> int:
+        key = self._next_key
+        self._next_key += 1
+
+        return key
+
+    def _add_entity(self, entity: Entity, key: int) -> dict:
+        is_tracked = entity.id in self._keys
+        self._keys[entity.id] = key
+
+        woken_from = getattr(entity, "woken_from", None)
+        if woken_from is not None:
+            # Ключи меняются при новом снимке, запись спящей сущности должна знать актуальный
+            woken_from.key = key
+
+        record = entity.to_json()
+        self._records[key] = None if isinstance(entity, Map) else record
+
+        if isinstance(entity, Map):
+            entity.pop_changed_chunks()
+
+        # Измененные чанки карты забираются при каждом сохранении
+        if getattr(entity, "IS_ALWAYS_DIRTY", False) or isinstance(entity, Map):
+            self._always_dirty[entity.id] = entity
+
+        if not is_tracked:
+            entity.subscribe_on_destroy(
+                lambda entity=entity: self._on_entity_destroyed(entity))
+
+        return record
+
+    def _on_entity_destroyed(self, entity: Entity):
+        key = self._keys.pop(entity.id, None)
+        self._always_dirty.pop(entity.id, None)
+        self._dirty.pop(entity.id, None)
+
+        if key is None:
+            return
+
+        sleeping_record = getattr(entity, "sleeping_record", None)
+        if sleeping_record is not None:
+            # Сущность заснула, ее запись остается в сохранении под тем же ключом
+            sleeping_record.key = key
+            return
+
+        self._records.pop(key, None)
+        self._deleted_keys.append(key)
+
+    def snapshot(self) -> List[dict]:
+        """
+        Записи всех сохраняемых сущностей для нового снимка. Ключи сущностей нумеруются заново
+        """
+        self.token = getrandbits(63)
+        self._records = dict()
+        self._always_dirty = dict()
+        self._dirty = dict()
+        self._deleted_keys = list()
+        self._next_key = 0
+
+        # Старые ключи больше не нужны, но подписки на destroy() остаются, поэтому ID сущностей помнятся
+        tracked_ids = set(self._keys.keys())
+        self._keys = dict()
+
+        records = list()
+        self._last_entity_id = self.game.last_entity_id
+        for entity in self.game.enabled_entities:
+            if not self._is_saved(entity):
+                continue
+
+            if entity.id in tracked_ids:
+                # Что бы _add_entity не подписался на destroy() второй раз
+                self._keys[entity.id] = None
+
+            records.append(self._add_entity(entity, self._get_new_key()))
+
+        if self.streamer is not None:
+            self.streamer.pop_slept_records()
+            self.streamer.pop_destroyed_records()
+
+            for sleeping_record in self.streamer.get_sleeping_records():
+                sleeping_record.key = self._get_new_key()
+                self._records[sleeping_record.key] = sleeping_record.record
+                records.append(sleeping_record.record)
+
+        return records
+
+    def _get_record_change(self, key: int, record: dict) -> List[dict]:
+        if _is_same_record(record, self._records[key]):
+            return []
+
+        self._records[key] = record
+        return [{'op': 'put', 'key': key, 'record': record}]
+
+    def collect_changes(self) -> List[dict]:
+        """
+        Изменения с прошлого снимка или прошлого вызова
+        """
+        changes = [{'op': 'delete', 'key': key} for key in self._deleted_keys]
+        self._deleted_keys = list()
+
+        # Новые сущности находятся по ID, поэтому все сущности мира не перебираются
+        new_entities = self.game.get_enabled_entities_after(self._last_entity_id)
+        self._last_entity_id = self.game.last_entity_id
+
+        for entity in new_entities:
+            if not self._is_saved(entity):
+                continue
+
+            woken_from = getattr(entity, "woken_from", None)
+
+            if woken_from is not None and woken_from.key is not None:
+                # Проснувшаяся сущность уже есть в сохранении
+                saved_record = self._records[woken_from.key]
+                self._add_entity(entity, woken_from.key)
+                self._records[woken_from.key] = saved_record
+                changes += self._get_record_change(
+                    woken_from.key, entity.to_json())
+                continue
+
+            key = self._get_new_key()
+            changes.append(
+                {'op': 'put', 'key': key, 'record': self._add_entity(entity, key)})
+
+        if self.streamer is not None:
+            # Проснувшиеся сущности, удаленные раньше, чем трекер их увидел
+            for sleeping_record in self.streamer.pop_destroyed_records():
+                if sleeping_record.key is not None and sleeping_record.key in self._records:
+                    del self._records[sleeping_record.key]
+                    changes.append(
+                        {'op': 'delete', 'key': sleeping_record.key})
+
+            for sleeping_record in self.streamer.pop_slept_records():
+                if sleeping_record.key is None:
+                    # Сущность создана и заснула между сохранениями
+                    sleeping_record.key = self._get_new_key()
+                    self._records[sleeping_record.key] = sleeping_record.record
+                    changes.append({'op': 'put', 'key': sleeping_record.key,
+                                    'record': sleeping_record.record})
+                else:
+                    changes += self._get_record_change(
+                        sleeping_record.key, sleeping_record.record)
+
+        candidates = list(self._dirty.values())
+        candidates += [entity for entity in self._always_dirty.values()
+                       if entity.id not in self._dirty]
+        self._dirty = dict()
+
+        for entity in candidates:
+            key = self._keys.get(entity.id)
+            if key is None or not entity.enabled:
+                continue
+
+            if isinstance(entity, Map):
+                for index in entity.pop_changed_chunks():
+                    changes.append({'op': 'chunk', 'key': key, 'index': index,
+                                    'tiles': entity.chunks[index].get_saved_tiles()})
+                continue
+
+            changes += self._get_record_change(key, entity.to_json())
+
+        return changes
@@ -141,6 +141,9 @@ class BaseDamagingItem(UsableItem):
         self.last_time_used = 0
 
     def use(self, initiator: Entity):
+        # Импорт здесь, иначе будет циклический импорт
+        from entities.living_entities import LivingEntity
+
         if initiator.game.scene_passed_time - self.last_time_used < self.COOLDOWN:
             return
 
@@ -155,11 +158,10 @@ class BaseDamagingItem(UsableItem):
 
         SplashAttackEntity(attack_point)
 
-        # TODO: вот этот hasattr вызов просто ужасен, но мне лень решать проблему с циклическими импортами, так что и так сойдет
         attacked_entities = filter(
-            lambda x: hasattr(x, "add_hp") and (
-                x.position - attack_point).magnitude() <= self.ATTACK_RANGE and x.id != initiator.id,
-            initiator.game.enabled_entities
+            lambda x: x.id != initiator.id,
+            initiator.game.query_radius(
+                attack_point, self.ATTACK_RANGE, LivingEntity)
         )
 
         for ent in attacked_entities:
@@ -1,3 +1,3 @@
 from ..entities.entity import Entity
 from ..entities.mixins import SpriteMixin, CollisionMixin, VelocityMixin, MouseEventMixin, BlockingCollisionMixin
-from ..entities.builtin_entities.particles import ParticleSystem
+from ..entities.builtin_entities.particles import ParticleEngine, ParticleSystem
@@ -1,13 +1,227 @@
-from random import randint
-from typing import List, Tuple
-from pygame import Surface
+from typing import Dict, List, Tuple, Union
+from pygame import Rect, Surface
 from ..entity import Entity
 from ...utils.math import Vector2
-from ...utils.drawable import SpriteWithCameraOffset
+from ...utils.drawable import BatchSprite
+
+import numpy as np
+
+
+class ParticleEngine(Entity):
+    """
+    Общий движок партиклов всех систем.
+
+    Партиклы хранятся в массивах numpy (позиции, скорости, время появления, время жизни, картинка и слой),
+    поэтому шаг симуляции считается сразу для всех партиклов. Места умерших партиклов используются снова,
+    массивы растут только когда свободных мест не хватает.
+
+    Партиклы каждого слоя рисуются одним BatchSprite, одним вызовом blits. Картинки не копируются,
+    все партиклы с одной картинкой рисуют одну и ту же поверхность.
+
+    Пока живых партиклов нет, движок выключен. Используйте ParticleEngine.get_instance()
+    """
+
+    INITIAL_CAPACITY = 256
+
+    _instance: "ParticleEngine" = None
+
+    @classmethod
+    def get_instance(cls) -> "ParticleEngine":
+        if cls._instance is None:
+            cls._instance = cls()
+
+        return cls._instance
+
+    def __init__(self) -> None:
+        super().__init__(Vector2(0, 0))
+
+        self._positions = np.zeros((0, 2))
+        self._velocities = np.zeros((0, 2))
+        self._spawn_times = np.zeros(0)
+        self._lifetimes = np.zeros(0)
+        self._image_indexes = np.zeros(0, dtype=np.int64)
+        self._layers = np.zeros(0)
+        self._alive = np.zeros(0, dtype=bool)
+        self._grow(self.INITIAL_CAPACITY)
+
+        self._images: List[Surface] = []
+        self._image_ids: Dict[Surface, int] = dict()
+        # Половины размеров картинок, партиклы рисуются центром в своей позиции
+        self._image_half_sizes = np.zeros((0, 2), dtype=np.int64)
+        # Самая большая сторона картинок, на нее расширяется область видимости при отсечении партиклов
+        self._max_image_size = 0
+
+        self._layer_sprites: Dict[Union[int, float], ParticlesLayerSprite] = dict()
+        self._random = np.random.default_rng()
+
+        self.subscribe_on_update(self.update_particles)
+        self.subscribe_on_destroy(self._remove_layer_sprites)
+        self.disable()
+
+    @property
+    def capacity(self) -> int:
+        return len(self._alive)
+
+    @property
+    def alive_count(self) -> int:
+        return int(np.count_nonzero(self._alive))
+
+    def _grow(self, new_capacity: int):
+        added = new_capacity - self.capacity
+
+        self._positions = np.concatenate((self._positions, np.zeros((added, 2))))
+        self._velocities = np.concatenate((self._velocities, np.zeros((added, 2))))
+        self._spawn_times = np.concatenate((self._spawn_times, np.zeros(added)))
+        self._lifetimes = np.concatenate((self._lifetimes, np.zeros(added)))
+        self._image_indexes = np.concatenate(
+            (self._image_indexes, np.zeros(added, dtype=np.int64)))
+        self._layers = np.concatenate((self._layers, np.zeros(added)))
+        self._alive = np.concatenate((self._alive, np.zeros(added, dtype=bool)))
+
+    def _get_image_index(self, image: Surface) -> int:
+        index = self._image_ids.get(image)
+
+        if index is None:
+            index = self._image_ids[image] = len(self._images)
+            self._images.append(image)
+            self._image_half_sizes = np.concatenate(
+                (self._image_half_sizes, [[image.get_width() // 2, image.get_height() // 2]]))
+            self._max_image_size = max(self._max_image_size, *image.get_size())
+
+        return index
+
+    def emit(
+            self,
+            position: Vector2,
+            count: int,
+            image: Surface,
+            lifetime: float,
+            min_spawn_offset: Vector2,
+            max_spawn_offset: Vector2,
+            min_velocity: Vector2,
+            max_velocity: Vector2,
+            layer: Union[int, float] = 0
+    ):
+        """
+        Создает count партиклов в position.
+
+        Смещение от позиции и скорость (в пикселях в секунду) выбираются случайно
+        между минимальными и максимальными значениями включительно, как в random.randint
+        """
+        if count <= 0:
+            return
+
+        free_slots = np.flatnonzero(~self._alive)
+        if len(free_slots) < count:
+            new_capacity = self.capacity
+            while new_capacity - self.capacity + len(free_slots) < count:
+                new_capacity *= 2
+
+            self._grow(new_capacity)
+            free_slots = np.flatnonzero(~self._alive)
+
+        slots = free_slots[:count]
+
+        self._positions[slots, 0] = position.x + self._random.integers(
+            int(min_spawn_offset.x), int(max_spawn_offset.x) + 1, count)
+        self._positions[slots, 1] = position.y + self._random.integers(
+            int(min_spawn_offset.y), int(max_spawn_offset.y) + 1, count)
+        self._velocities[slots, 0] = self._random.integers(
+            int(min_velocity.x), int(max_velocity.x) + 1, count)
+        self._velocities[slots, 1] = self._random.integers(
+            int(min_velocity.y), int(max_velocity.y) + 1, count)
+
+        self._spawn_times[slots] = self.game.scene_passed_time
+        self._lifetimes[slots] = lifetime
+        self._image_indexes[slots] = self._get_image_index(image)
+        self._layers[slots] = layer
+        self._alive[slots] = True
+
+        if layer not in self._layer_sprites:
+            self._layer_sprites[layer] = ParticlesLayerSprite(self, layer)
+
+        if not self.enabled:
+            self.enable()
+
+    def update_particles(self, delta_time: float):
+        alive = self._alive
+
+        self._positions[alive] += self._velocities[alive] * delta_time
+
+        dead = alive & (self.game.scene_passed_time -
+                        self._spawn_times > self._lifetimes)
+        alive[dead] = False
+
+        if not alive.any():
+            self.disable()
+
+    def get_layer_blits(self, layer: Union[int, float], camera_offset: Tuple[int, int], viewport: Rect) -> List[Tuple[Surface, Tuple[int, int]]]:
+        """
+        Картинки и экранные позиции живых партиклов слоя layer, которые видны во viewport.
+
+        Партиклы отсекаются по позиции, то есть по центру картинки, поэтому viewport расширяется на размер
+        самой большой картинки, что бы не пропадали партиклы у краев экрана
+        """
+        if not self.enabled:
+            return []
+
+        viewport = viewport.inflate(
+            self._max_image_size * 2, self._max_image_size * 2)
+        positions = self._positions
+        visible = self._alive & (self._layers == layer) & \
+            (positions[:, 0] >= viewport.left) & (positions[:, 0] < viewport.right) & \
+            (positions[:, 1] >= viewport.top) & (
+                positions[:, 1] < viewport.bottom)
+
+        indexes = np.flatnonzero(visible)
+        if len(indexes) == 0:
+            return []
+
+        image_indexes = self._image_indexes[indexes]
+        screen_positions = positions[indexes].astype(np.int64) - \
+            self._image_half_sizes[image_indexes] - camera_offset
+
+        images = self._images
+        return [(images[image_index], (x, y)) for image_index, (x, y)
+                in zip(image_indexes.tolist(), screen_positions.tolist())]
+
+    def clear(self):
+        """
+        Удаляет все партиклы
+        """
+        self._alive[:] = False
+        self.disable()
+
+    def _remove_layer_sprites(self):
+        for sprite in self._layer_sprites.values():
+            sprite.kill()
+
+        self._layer_sprites = dict()
+
+        if ParticleEngine._instance is self:
+            ParticleEngine._instance = None
+
+
+class ParticlesLayerSprite(BatchSprite):
+    """
+    Рисует партиклы одного слоя движка партиклов
+    """
+
+    def __init__(self, engine: ParticleEngine, layer: Union[int, float]) -> None:
+        self.engine = engine
+        super().__init__(layer)
+
+    def get_blits(self, camera_offset: Tuple[int, int], viewport: Rect) -> List[Tuple[Surface, Tuple[int, int]]]:
+        return self.engine.get_layer_blits(self.layer, camera_offset, viewport)
 
 
 class ParticleSystem(Entity):
-    """Система партиклов"""
+    """
+    Система партиклов
+
+    Хранит настройки партиклов, сами партиклы живут и рисуются в общем ParticleEngine.
+    Система не получает обновлений, поэтому всегда выключена
+    """
 
     def __init__(
             self,
@@ -24,10 +238,6 @@ class ParticleSystem(Entity):
 
         self._particle_image = particle_image
 
-        # Particle images like: (SPRITE, TIME_STARTED_LIVING, VELOCITY)
-        self._particles: List[Tuple[SpriteWithCameraOffset,
-                                    float, Vector2]] = []
-
         self.max_lifetime = max_lifetime
         self.min_spawn_offset = min_spawn_offset
         self.max_spawn_offset = max_spawn_offset
@@ -35,40 +245,23 @@ class ParticleSystem(Entity):
         self.max_particle_velocity = max_particle_velocity
         self.particle_image_layer = particle_image_layer
 
-        self.subscribe_on_update(self.update_particles)
-
-    def update_particles(self, _: float):
-        to_delete = []
-
-        for i, particle in enumerate(self._particles):
-            particle[0].center_position = (
-                particle[0].center_position[0] + particle[2].get_tuple()[0],
-                particle[0].center_position[1] + particle[2].get_tuple()[1]
-            )
-
-            if self.game.scene_passed_time - particle[1] > self.max_lifetime:
-                particle[0].kill()
-                to_delete.append(i)
-
-        # какой ужас
-        deleted_counter = 0
+        self.disable()
 
-        for i in to_delete:
-            del self._particles[i - deleted_counter]
-            deleted_counter += 1
+    def destroy_when_idle(self):
+        """
+        Удаляет систему. Уже созданные партиклы живут в ParticleEngine до конца своего времени жизни
+        """
+        self.destroy()
 
     def burst(self, particle_count: int):
-        for _ in range(particle_count):
-            self._particles.append(
-                (
-                    SpriteWithCameraOffset(
-                        self._particle_image,
-                        self.particle_image_layer,
-                        (self.position + Vector2.from_tuple((randint(self.min_spawn_offset.x, self.max_spawn_offset.x), randint(
-                            self.min_spawn_offset.y, self.max_spawn_offset.y)))).get_tuple()
-                    ),
-                    self.game.scene_passed_time,
-                    Vector2.from_tuple((randint(self.min_particle_velocity.x, self.max_particle_velocity.x), randint(
-                        self.min_particle_velocity.y, self.max_particle_velocity.y)))
-                )
-            )
+        ParticleEngine.get_instance().emit(
+            self.position,
+            particle_count,
+            self._particle_image,
+            self.max_lifetime,
+            self.min_spawn_offset,
+            self.max_spawn_offset,
+            self.min_particle_velocity,
+            self.max_particle_velocity,
+            self.particle_image_layer
+        )
@@ -2,10 +2,14 @@
 Base entity class.
 """
 
+from time import perf_counter
 from types import FunctionType, MethodType
-from typing import Union
+from typing import Union, TYPE_CHECKING
 from ..utils.math import Vector2
+from ..utils.component_store import ComponentVector
 from ..game import Game
+if TYPE_CHECKING:
+    from ..utils.profiler import FrameProfiler
 
 
 class Entity:
@@ -20,6 +24,9 @@ class Entity:
     # Is destroys on scene unloading?
     IS_PERSISTENT = False
 
+    # Position is indexed by game after adding entity in game
+    _is_position_indexed = False
+
     def __init__(self, position: Vector2) -> None:
         """
         Initializing new entity.
@@ -36,8 +43,37 @@ class Entity:
         self.id = 0
         self.game = Game.get_instance()
         self.game.add_entity(self)
+        self._is_position_indexed = True
         self._enabled = True
 
+    @property
+    def position(self) -> Vector2:
+        """
+        Position of entity in world.
+
+        Every assignment calls _on_position_changed method
+        """
+        return self._position
+
+    @position.setter
+    def position(self, new_position: Vector2):
+        if isinstance(new_position, ComponentVector):
+            # View into position of other entity in component store, entity should not follow it
+            new_position = new_position.copy()
+
+        self._position = new_position
+        self._on_position_changed()
+
+    def _on_position_changed(self):
+        """
+        Called on every assignment of position.
+
+        Keeps position of entity in grid of game up to date (see Game.query_radius).
+        Used by mixins to keep their spatial indexes up to date
+        """
+        if self._is_position_indexed:
+            self.game.update_entity_position(self)
+
     def subscribe_on_update(self, function: Union[FunctionType, MethodType]):
         """
         Subscribes function for updates.
@@ -61,6 +97,15 @@ class Entity:
         for method in self._on_update:
             method(delta_time)
 
+    def _update_with_profiling(self, delta_time: float, profiler: "FrameProfiler"):
+        """
+        Same as _update, but records time of every subscribed function in profiler
+        """
+        for method in self._on_update:
+            start = perf_counter()
+            method(delta_time)
+            profiler.record_callback(self, method, perf_counter() - start)
+
     def destroy(self):
         """
         This method will be called on destroy of this entity
@@ -74,6 +119,7 @@ class Entity:
         self._subscribed_events = list()
         self._on_destroy = list()
         self._on_update = list()
+        self._is_position_indexed = False
         self.game.delete_entity(self.id)
 
     def enable(self):
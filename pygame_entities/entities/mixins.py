@@ -4,7 +4,7 @@ Mixins for entities (Based on Entity class)
 from types import FunctionType, MethodType
 from typing import Union, List
 from ..utils.drawable import BaseSprite
-from ..utils.math import Vector2
+from ..utils.math import Vector2, damp
 from ..utils.collision_side import check_side, UP, DOWN, RIGHT, LEFT
 from ..game import Game
 
@@ -17,9 +17,14 @@ class SpriteMixin(Entity):
     """
     Sprite render mixin
 
-    Need to run sprite_init method for initialization
+    Need to run sprite_init method for initialization.
+
+    Sprite is moved only when position of entity changes.
+    In fixed timestep mode of Game sprite is interpolated between positions of entity in last two steps
     """
 
+    _is_sprite_initialized = False
+
     def sprite_init(self, sprite: BaseSprite, sprite_position_offset=Vector2()) -> None:
         """
         Initializating this mixin.
@@ -28,19 +33,65 @@ class SpriteMixin(Entity):
         """
         self.sprite_offset = sprite_position_offset
         self.sprite = sprite
-        self.sprite.center_position = (
-            self.position + self.sprite_offset).get_integer_tuple()
-        self.subscribe_on_update(self.sprite_update_position)
+        self._is_sprite_initialized = True
+        # Owned by mixin and changed in place
+        self._sprite_interpolation_from = Vector2()
+        self._sprite_interpolation_to = Vector2()
+        self.end_sprite_interpolation()
         self.subscribe_on_destroy(self.kill_sprite)
 
-    def sprite_update_position(self, delta_time: float):
+    def _on_position_changed(self):
+        super()._on_position_changed()
+
+        if not self._is_sprite_initialized:
+            return
+
+        if self.game.is_interpolating:
+            self.game.add_moved_sprite_entity(self)
+        else:
+            self.sprite_update_position()
+
+    def sprite_update_position(self, _=None):
         """
-        Runned every frame.
+        Changing position of sprite to position of entity.
+
+        Called on every change of position (without interpolation)
+        """
+        position = self.position
+        offset = self.sprite_offset
+        to = self._sprite_interpolation_to.set(
+            position.x + offset.x, position.y + offset.y)
+        self.sprite.center_position = (int(to.x), int(to.y))
 
-        Changing position of sprite.
+    def start_sprite_interpolation(self):
         """
-        self.sprite.center_position = (
-            self.position + self.sprite_offset).get_integer_tuple()
+        Called by Game at the end of simulation step, in which entity moved.
+
+        Sprite will be interpolated from position in previous step to current position
+        """
+        position = self.position
+        offset = self.sprite_offset
+        to = self._sprite_interpolation_to
+
+        self._sprite_interpolation_from.set(to.x, to.y)
+        to.set(position.x + offset.x, position.y + offset.y)
+
+    def end_sprite_interpolation(self):
+        """
+        Called by Game, when entity stopped. Places sprite to position of entity
+        """
+        self.sprite_update_position()
+        to = self._sprite_interpolation_to
+        self._sprite_interpolation_from.set(to.x, to.y)
+
+    def interpolate_sprite(self, alpha: float):
+        """
+        Called by Game before rendering
+        """
+        start = self._sprite_interpolation_from
+        to = self._sprite_interpolation_to
+        self.sprite.center_position = (int(start.x + (to.x - start.x) * alpha),
+                                       int(start.y + (to.y - start.y) * alpha))
 
     def kill_sprite(self):
         """
@@ -48,22 +99,34 @@ class SpriteMixin(Entity):
 
         Deleting sprite from game
         """
+        self._is_sprite_initialized = False
+        self.game.remove_sprite_entity(self)
         self.sprite.kill()
 
 # TODO: Add function to cast with image polygons
 # TODO: Add not rectangle collisions
-# TODO: Separate CollisionMixin entities from all enabled_entities, to iterate on collision check only on entities with collision mixin
 
 
 class CollisionMixin(Entity):
     """
     Mixin for collision callbacks
 
-    Need to run collision_init method for initialization
+    Need to run collision_init method for initialization.
+
+    Colliders are stored in colliders grid of Game, so casts check only colliders near casted rect.
+    Collisions of colliders with is_check_collision=True are checked with pairs,
+    which Game finds for all colliders once per frame (see SweepAndPrune)
     """
 
+    _is_collider_registered = False
+    _is_check_collision = False
+    # Rect of static collider, which is built once
+    _static_collider_rect: Union[pygame.Rect, None] = None
+
+    is_static_collider = False
+
     def collision_init(
-        self, collider_size: Vector2, is_trigger=False, is_check_collision=False
+        self, collider_size: Vector2, is_trigger=False, is_check_collision=False, is_static=False
     ):
         """
         Initializing this mixin.
@@ -71,14 +134,58 @@ class CollisionMixin(Entity):
         If is_check_collisions=False subscribed functions on_collide and on_trigger will not be called.
 
         It is used for optimization.
+
+        is_static=True is for colliders, which never move (buildings, walls).
+        Their rect is built once, they are kept in separate grid of Game
+        and are not checked for collisions with each other
         """
         self.collider_size: Vector2 = collider_size
+        self.is_static_collider = is_static
+        if is_static:
+            self._static_collider_rect = self._build_collider_rect()
+        # Used by entities in component store (see VelocityMixin)
+        self.game.components.set_collider_size(self, collider_size)
         self.is_trigger: bool = is_trigger
         self.subscribe_on_update(self._check_collisions)
         self.is_check_collision: bool = is_check_collision
         self.on_collide_callbacks = list()
         self.on_trigger_callbacks = list()
 
+        self._is_collider_registered = True
+        self.game.update_collider(self)
+        self.subscribe_on_destroy(self._unregister_collider)
+
+    @property
+    def is_check_collision(self) -> bool:
+        return self._is_check_collision
+
+    @is_check_collision.setter
+    def is_check_collision(self, value: bool):
+        self._is_check_collision = value
+
+        if self._is_collider_registered:
+            self.game.set_collider_checking(self, value)
+
+    def _on_position_changed(self):
+        super()._on_position_changed()
+
+        if self._is_collider_registered:
+            if self.is_static_collider:
+                self._static_collider_rect = self._build_collider_rect()
+
+            # Colliders of entities, moved by component store, are updated by Game all at once (see Game.update_components)
+            if self.game.components.moving_entity is not self:
+                self.game.update_collider(self)
+
+    def _unregister_collider(self):
+        """
+        Runned on destroy of entity.
+
+        Removing collider from colliders grid
+        """
+        self._is_collider_registered = False
+        self.game.remove_collider(self)
+
     def subscribe_on_collide(self, function: Union[FunctionType, MethodType]):
         """
         Subscribes function for collisions.
@@ -122,8 +229,10 @@ class CollisionMixin(Entity):
         if not self.is_check_collision:
             return
 
-        for entity in CollisionMixin.cast_rect(self.collider_rect):
-            if entity.id == self.id:
+        self_collider_rect = self.collider_rect
+        for entity in self.game.get_collision_candidates(self):
+            # Pairs are found at the start of frame, colliders could move since then
+            if not self_collider_rect.colliderect(entity.collider_rect):
                 continue
 
             if entity.is_trigger or self.is_trigger:
@@ -137,10 +246,21 @@ class CollisionMixin(Entity):
     def collider_rect(self) -> pygame.Rect:
         """
         Returning pygame.Rect of this collider.
+
+        Rect of static collider is cached, copy of it is returned, so it can be changed
         """
+        if self._static_collider_rect is not None:
+            return self._static_collider_rect.copy()
+
+        return self._build_collider_rect()
+
+    def _build_collider_rect(self) -> pygame.Rect:
+        position = self.position
+        size = self.collider_size
+
         return pygame.Rect(
-            (self.position - self.collider_size / 2).get_integer_tuple(),
-            self.collider_size.get_integer_tuple(),
+            int(position.x - size.x / 2), int(position.y - size.y / 2),
+            int(size.x), int(size.y)
         )
 
     @staticmethod
@@ -148,49 +268,149 @@ class CollisionMixin(Entity):
         """
         Casts a rect and returns all collided entities with CollisionMixin
         """
-        collided_entities = list()
-        for entity in Game.get_instance().enabled_entities:
-            if not isinstance(entity, CollisionMixin):
-                continue
-
-            if rect.colliderect(entity.collider_rect):
-                collided_entities.append(entity)
+        return [entity for entity in Game.get_instance().query_colliders(rect)
+                if rect.colliderect(entity.collider_rect)]
 
-        return collided_entities
+    @staticmethod
+    def cast_point(point: Vector2) -> List["CollisionMixin"]:
+        """
+        Returns all entities with CollisionMixin, which colliders contain point
+        """
+        point_tuple = point.get_tuple()
+        return [entity for entity in Game.get_instance().query_colliders(pygame.Rect(point.get_integer_tuple(), (1, 1)))
+                if entity.collider_rect.collidepoint(point_tuple)]
 
 
 class VelocityMixin(Entity):
     """
     Mixin for smooth moving of entity
 
-    Change self.velocity for moving
+    Change self.velocity (in pixels per second) for moving.
+
+    If USE_COMPONENT_STORE = True, position, velocity and collider size of entity are kept in Game.components
+    (see ComponentStore), and all such entities are moved in one vectorized pass instead of update callbacks.
+    self.position and self.velocity of these entities are views into store
     """
 
+    USE_COMPONENT_STORE = False
+
+    _is_stored = False
+
     def velocity_init(self, is_kinematic=True, velocity_regress_strength=0.0):
         """
         Initializing this mixin.
 
         velocity_redress_strength used for smooth changing velocity to Vector(0, 0)
+        (part of velocity, which is lost in 1/60 of second).
+
+        Velocity is slowed down in place, so assign new vector to self.velocity instead of shared one
         """
-        self.is_kinematic: bool = is_kinematic
+        if self.USE_COMPONENT_STORE:
+            store = self.game.components
+            self._position, self._velocity = store.add(
+                self, self.position, Vector2(0, 0))
+            self._is_stored = True
+
+            if isinstance(self, CollisionMixin) and hasattr(self, "collider_size"):
+                store.set_collider_size(self, self.collider_size)
+            if not self.enabled:
+                store.set_enabled(self, False)
+
+            self.subscribe_on_destroy(self._remove_from_component_store)
+        else:
+            self.velocity: Vector2 = Vector2(0, 0)
+            self.subscribe_on_update(self._update_velocity_and_pos)
 
+        self.is_kinematic: bool = is_kinematic
         self.velocity_regress_strength: float = velocity_regress_strength
-        self.velocity: Vector2 = Vector2(0, 0)
 
-        self.subscribe_on_update(self._update_velocity_and_pos)
+    @property
+    def position(self) -> Vector2:
+        return self._position
+
+    @position.setter
+    def position(self, new_position: Vector2):
+        if not self._is_stored:
+            Entity.position.fset(self, new_position)
+            return
+
+        self._position.set(new_position.x, new_position.y)
+        self._on_position_changed()
+
+    @property
+    def velocity(self) -> Vector2:
+        return self._velocity
+
+    @velocity.setter
+    def velocity(self, new_velocity: Vector2):
+        if self._is_stored:
+            self._velocity.set(new_velocity.x, new_velocity.y)
+        else:
+            self._velocity = new_velocity
+
+    @property
+    def is_kinematic(self) -> bool:
+        return self._is_kinematic
+
+    @is_kinematic.setter
+    def is_kinematic(self, value: bool):
+        self._is_kinematic = value
+
+        if self._is_stored:
+            self.game.components.kinematic[self.game.components.get_slot(
+                self)] = value
+
+    @property
+    def velocity_regress_strength(self) -> float:
+        return self._velocity_regress_strength
+
+    @velocity_regress_strength.setter
+    def velocity_regress_strength(self, value: float):
+        self._velocity_regress_strength = value
+
+        if self._is_stored:
+            self.game.components.regress_strengths[self.game.components.get_slot(
+                self)] = value
+
+    def enable(self):
+        super().enable()
+
+        if self._is_stored:
+            self.game.components.set_enabled(self, True)
+
+    def disable(self):
+        super().disable()
+
+        if self._is_stored:
+            self.game.components.set_enabled(self, False)
 
-    def _update_velocity_and_pos(self, _):
+    def _remove_from_component_store(self):
+        """
+        Runned on destroy of entity.
+
+        Position and velocity stop being views into store and keep their last values
+        """
+        self._is_stored = False
+        self.game.components.remove(self)
+
+    def _update_velocity_and_pos(self, delta_time: float):
         """
         Called every frame.
 
         Changing position of entity
         """
-        self.position += self.velocity
+        velocity = self.velocity
+        if velocity.x == 0 and velocity.y == 0:
+            return
+
+        # Position can be shared with other objects, so it is not changed in place
+        position = self.position
+        self.position = Vector2(position.x + velocity.x * delta_time,
+                                position.y + velocity.y * delta_time)
 
         if not self.is_kinematic:
-            self.velocity = Vector2.lerp(
-                self.velocity, Vector2(0, 0), self.velocity_regress_strength
-            )
+            velocity.imul(
+                1 - damp(self.velocity_regress_strength, delta_time))
 
 
 class BlockingCollisionMixin(CollisionMixin):
@@ -233,8 +453,16 @@ class MouseEventMixin(CollisionMixin):
     Based on CollisionMixin.
 
     WARNING: Needs to be initialized after collision_init method.
+
+    Mouse events are received by one subscriber for all entities,
+    which finds entities under cursor with colliders grid.
+    Entities get events as if every entity subscribed for them itself:
+    disabled entities get them too, and entities get them in order of creation.
     """
 
+    _is_dispatcher_subscribed = False
+    _is_mouse_events_initialized = False
+
     def mouse_events_init(self):
         """
         Initializing this mixin
@@ -243,10 +471,37 @@ class MouseEventMixin(CollisionMixin):
         self._on_mouse_down = list()
         self._on_mouse_up = list()
         self._on_mouse_motion = list()
-        self.subscribe_for_event(
-            self._mouse_events, pygame.MOUSEBUTTONDOWN)
-        self.subscribe_for_event(self._mouse_events, pygame.MOUSEBUTTONUP)
-        self.subscribe_for_event(self._mouse_events, pygame.MOUSEMOTION)
+        self._is_mouse_events_initialized = True
+
+        if not MouseEventMixin._is_dispatcher_subscribed:
+            MouseEventMixin._is_dispatcher_subscribed = True
+            self.game.subscribe_for_event(
+                MouseEventMixin._dispatch_mouse_event, pygame.MOUSEBUTTONDOWN)
+            self.game.subscribe_for_event(
+                MouseEventMixin._dispatch_mouse_event, pygame.MOUSEBUTTONUP)
+            self.game.subscribe_for_event(
+                MouseEventMixin._dispatch_mouse_event, pygame.MOUSEMOTION)
+
+    @staticmethod
+    def _dispatch_mouse_event(event: pygame.event.Event):
+        """
+        Runned on every MOUSEBUTTONDOWN, MOUSEBUTTONUP, MOUSEMOTION events.
+
+        Passing event to entities under cursor
+        """
+        game = Game.get_instance()
+        mouse_world_position = game.from_screen_to_world_point(
+            Vector2.from_tuple(pygame.mouse.get_pos()))
+
+        point = mouse_world_position.get_tuple()
+        entities = [entity for entity in game.query_colliders(
+            pygame.Rect(mouse_world_position.get_integer_tuple(), (1, 1)), include_disabled=True)
+            if isinstance(entity, MouseEventMixin) and entity._is_mouse_events_initialized
+            and entity.collider_rect.collidepoint(point)]
+        entities.sort(key=lambda entity: entity.id)
+
+        for entity in entities:
+            entity._mouse_events(event)
 
     def subscribe_on_mouse_down(self, function: Union[MethodType, FunctionType]):
         """
@@ -274,17 +529,10 @@ class MouseEventMixin(CollisionMixin):
 
     def _mouse_events(self, event: pygame.event.Event):
         """
-        Runned on every MOUSEBUTTONDOWN, MOUSEBUTTONUP, MOUSEMOTION events.
+        Runned by mouse events dispatcher, when cursor is over collider of this entity.
 
         Calling subscribed functions
         """
-        # Checking, is mouse pointer is over object
-        mouse_world_position = self.game.from_screen_to_world_point(
-            Vector2.from_tuple(pygame.mouse.get_pos()))
-
-        if not self.collider_rect.collidepoint(mouse_world_position.get_tuple()):
-            return
-
         if event.type == pygame.MOUSEBUTTONDOWN:
             [f(event.button) for f in self._on_mouse_down]
         elif event.type == pygame.MOUSEBUTTONUP:
@@ -4,14 +4,22 @@ Main Game class.
 Needs to be in every game builded with this pygame_entities library
 """
 
+import os
 from types import FunctionType, MethodType
-from typing import Dict, List, Tuple, Union, TYPE_CHECKING
+from typing import Dict, Iterator, List, Tuple, Union, TYPE_CHECKING
 if TYPE_CHECKING:
     from .entities.entity import Entity
+    from .entities.mixins import CollisionMixin
     from .utils.drawable import BaseSprite
-from .utils.math import Vector2
+from .utils.math import Vector2, damp, lerp
+from .utils.spatial_hash import SpatialHash
+from .utils.render_group import CameraLayeredUpdates
+from .utils.profiler import FrameProfiler
+from .utils.component_store import ComponentStore
+from .utils.sweep_and_prune import SweepAndPrune
 from .scenes import BaseScene
 
+import numpy as np
 import pygame
 
 
@@ -28,16 +36,33 @@ class Game:
 
     _instance = None
 
-    def get_instance(screen_resolution=(0, 0), frame_rate=60, void_color=(0, 0, 0)) -> "Game":
+    # Size of one cell of colliders grid in pixels
+    COLLIDERS_GRID_CELL_SIZE = 256
+    # Margin (in pixels) of not static colliders in broad phase of collisions,
+    # in addition to distance, which they move by their velocity in frame
+    COLLISIONS_BROAD_PHASE_MARGIN = 2
+    # Size of one cell of grid of entities positions in pixels
+    ENTITIES_GRID_CELL_SIZE = 256
+
+    # Size of off-screen surface in headless mode, if screen_resolution is (0, 0)
+    HEADLESS_RESOLUTION = (1280, 720)
+
+    # Key for showing / hiding profiler overlay
+    PROFILER_OVERLAY_KEY = pygame.K_F3
+
+    def get_instance(screen_resolution=(0, 0), frame_rate=60, void_color=(0, 0, 0), headless=False) -> "Game":
         """
         Get instance of Game class.
+
+        If headless=True game doesn't open window (see Game.headless)
         """
         if Game._instance is None:
-            Game._instance = Game(screen_resolution, frame_rate, void_color)
+            Game._instance = Game(
+                screen_resolution, frame_rate, void_color, headless)
 
         return Game._instance
 
-    def __init__(self, screen_resolution=(0, 0), frame_rate=60, void_color=(0, 0, 0)) -> None:
+    def __init__(self, screen_resolution=(0, 0), frame_rate=60, void_color=(0, 0, 0), headless=False) -> None:
         """
         Do not use this.
 
@@ -46,34 +71,83 @@ class Game:
         if not Game._instance is None:
             raise Exception("Game class instantiated 2 times.")
 
+        # Headless game uses dummy video driver (events and keyboard still work, but without window),
+        # renders to off-screen surface and renders nothing, if render_enabled is False
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            # Display could be already initialized with real driver by pygame.init()
+            pygame.display.quit()
+
         pygame.init()
 
         # Public fields
         self.framerate: int = frame_rate
         self.void_color: Tuple[int, int, int] = void_color
         self.delta_time = 1 / self.framerate
-
-        self._screen = pygame.display.set_mode(screen_resolution)
+        self.render_enabled = not headless
+
+        if headless:
+            if screen_resolution == (0, 0):
+                screen_resolution = Game.HEADLESS_RESOLUTION
+            self._screen = pygame.Surface(screen_resolution)
+        else:
+            self._screen = pygame.display.set_mode(screen_resolution)
         self._screen_resolution = self.screen.get_size()
         self._clock = pygame.time.Clock()
         self.running = True
-        self._sprites = pygame.sprite.LayeredUpdates()
+        self._sprites = CameraLayeredUpdates()
 
         # Using dict, because with dict we can remove entities from game in O(1) time
         self._entity_counter = 0
         self._enabled_entities = dict()
         self._disabled_entities = dict()
 
+        # Enabled entities by every class in their MRO. Used for fast getting entities of some type
+        self._entities_by_type: Dict[type, Dict[int, "Entity"]] = dict()
+
+        # For collisions. Colliders are stored by entity id
+        self._colliders_grid = SpatialHash(Game.COLLIDERS_GRID_CELL_SIZE)
+        # Static colliders never move, so they are kept in separate grid, which is not changed by moving colliders
+        self._static_colliders_grid = SpatialHash(
+            Game.COLLIDERS_GRID_CELL_SIZE)
+        # Broad phase of collisions. Pairs of overlapping colliders are found once per frame,
+        # candidates of every checking collider are stored by its entity id
+        self._collisions_broad_phase = SweepAndPrune()
+        self._collision_candidates: Dict[int, List["CollisionMixin"]] = dict()
+        # Positions of all entities by entity id. Used by query_radius
+        self._entities_grid = SpatialHash(Game.ENTITIES_GRID_CELL_SIZE)
+
+        # Movement and colliders of entities with VelocityMixin.USE_COMPONENT_STORE = True
+        self.components = ComponentStore()
+
         # For camera
         self.camera_follow_smooth_coefficient = 0.1
         self._camera_position = Vector2(0, 0)
+        self._previous_camera_position = Vector2(0, 0)
         self._camera_follow_object = None
 
+        # For fixed timestep simulation (see set_fixed_timestep)
+        self.fixed_timestep: Union[float, None] = None
+        self.max_steps_per_frame = 5
+        self.skip_render_when_behind = False
+        self.max_skipped_renders = 2
+        # Part of simulation step passed since last step. Used for interpolation of rendering
+        self.interpolation_alpha = 1.0
+        self._accumulator = 0.0
+        # Entities with sprites, moved in current step / interpolated between last two steps
+        self._moved_sprite_entities: Dict["Entity", None] = dict()
+        self._interpolated_sprite_entities: Dict["Entity", None] = dict()
+
         # for event system
         self._subscribed_events: Dict[int,
                                       Dict[int, FunctionType]] = dict()
         self._subscribers_counter = 0
 
+        # Frame profiler. Disabled by default, overlay is toggled by PROFILER_OVERLAY_KEY
+        self.profiler = FrameProfiler()
+        self.subscribe_for_event(self._toggle_profiler_overlay, pygame.KEYDOWN)
+
         # for scenes
         self._current_scene = BaseScene
         self._current_scene.on_load(self)
@@ -138,6 +212,31 @@ class Game:
         """
         return list(self._disabled_entities.values())
 
+    def get_entities_of_type(self, entity_type: type) -> List["Entity"]:
+        """
+        List of enabled entities, which are instances of entity_type.
+
+        Registries of types are updated on adding/enabling/disabling/deleting of entities,
+        so only entities of this type are iterated
+        """
+        return list(self._entities_by_type.get(entity_type, {}).values())
+
+    def _register_entity_type(self, entity):
+        for entity_type in type(entity).__mro__:
+            if entity_type is object:
+                continue
+
+            entities = self._entities_by_type.get(entity_type)
+            if entities is None:
+                entities = self._entities_by_type[entity_type] = dict()
+            entities[entity.id] = entity
+
+    def _unregister_entity_type(self, entity):
+        for entity_type in type(entity).__mro__:
+            entities = self._entities_by_type.get(entity_type)
+            if entities is not None:
+                entities.pop(entity.id, None)
+
     def camera_follow_entity(self, entity: Union["Entity", None]):
         """
         Sets camera to follow some entity
@@ -181,33 +280,234 @@ class Game:
             del subscribers[subscriber_id]
         self._subscribed_events[event_type] = subscribers
 
+    def _toggle_profiler_overlay(self, event: pygame.event.Event):
+        if event.key == Game.PROFILER_OVERLAY_KEY:
+            self.profiler.toggle_overlay()
+
+    def set_fixed_timestep(self, steps_per_second: Union[float, None], max_steps_per_frame=5, skip_render_when_behind=False):
+        """
+        Enables fixed timestep simulation.
+
+        Simulation is updated with constant delta_time = 1 / steps_per_second,
+        as many times per frame as real time passed (but not more than max_steps_per_frame).
+        Sprites of moving entities and camera are interpolated between last two steps,
+        so simulation can run at lower rate than rendering.
+
+        If skip_render_when_behind is True, frames are not rendered while simulation is behind real time,
+        otherwise time, which simulation can't catch up, is dropped.
+
+        None - update simulation once per frame with real delta_time (default)
+        """
+        if steps_per_second is None:
+            self.fixed_timestep = None
+            self.interpolation_alpha = 1.0
+            self._snap_interpolated_sprites()
+            return
+
+        self.fixed_timestep = 1 / steps_per_second
+        self.max_steps_per_frame = max_steps_per_frame
+        self.skip_render_when_behind = skip_render_when_behind
+        self._accumulator = 0.0
+
+    @property
+    def is_interpolating(self) -> bool:
+        return self.fixed_timestep is not None
+
     def run(self):
         """
         Starts main loop of game.
 
         All configurations need to be created before calling this method
         """
+        frame_time = 1 / self.framerate
+        skipped_renders = 0
+
+        profiler = self.profiler
+
         while self.running:
-            self._screen.fill(self.void_color)
+            profiler.begin_frame()
 
-            # Updating systems
+            start = profiler.mark()
             self._update_events()
-            self._update_entities()
-            self._sprites.update()
-            self._camera_follow()
-
-            self._sprites.draw(self._screen)
-            pygame.display.flip()
-            self.delta_time = self._clock.tick(self.framerate) / 1000
-            self._scene_time_counter += self.delta_time
+            profiler.record("events", start)
+
+            if self.fixed_timestep is None:
+                self._step(self.delta_time)
+            else:
+                self._accumulator += min(frame_time,
+                                         self.fixed_timestep * self.max_steps_per_frame)
+
+                steps = 0
+                while self._accumulator >= self.fixed_timestep and steps < self.max_steps_per_frame:
+                    self._step(self.fixed_timestep)
+                    self._accumulator -= self.fixed_timestep
+                    steps += 1
+
+                if self._accumulator >= self.fixed_timestep:
+                    if self.skip_render_when_behind and skipped_renders < self.max_skipped_renders:
+                        skipped_renders += 1
+                        start = profiler.mark()
+                        frame_time = self._clock.tick(self.framerate) / 1000
+                        profiler.record("tick", start)
+                        profiler.end_frame()
+                        continue
+
+                    # Simulation can't catch up real time, so this time is dropped
+                    self._accumulator %= self.fixed_timestep
+
+                skipped_renders = 0
+                self.interpolation_alpha = self._accumulator / self.fixed_timestep
+                self._interpolate_sprites()
+
+            if self.render_enabled:
+                self._draw()
+
+                if not self.headless:
+                    start = profiler.mark()
+                    pygame.display.flip()
+                    profiler.record("flip", start)
+
+            # Waiting for next frame
+            start = profiler.mark()
+            frame_time = self._clock.tick(self.framerate) / 1000
+            profiler.record("tick", start)
+
+            if self.fixed_timestep is None:
+                self.delta_time = frame_time
+
+            profiler.end_frame()
 
         self._current_scene.on_end(self)
 
+    def step(self, count=1, delta_time: Union[float, None] = None, render=False):
+        """
+        Runs count updates of game as fast as possible, without waiting for frame time.
+
+        Every update handles events and makes one simulation step of delta_time
+        (by default fixed timestep if it is set, else 1 / framerate).
+        If render=True, game is rendered after every update (to off-screen surface in headless mode).
+
+        Used for simulation without display, benchmarks and tests
+        """
+        if delta_time is None:
+            delta_time = self.fixed_timestep or 1 / self.framerate
+
+        profiler = self.profiler
+
+        for _ in range(count):
+            profiler.begin_frame()
+
+            start = profiler.mark()
+            self._update_events()
+            profiler.record("events", start)
+
+            self._step(delta_time)
+
+            if render:
+                if self.is_interpolating:
+                    self.interpolation_alpha = 1.0
+                    self._interpolate_sprites()
+
+                self._draw()
+
+            profiler.end_frame()
+
+    def _step(self, delta_time: float):
+        """
+        One step of simulation
+        """
+        self.delta_time = delta_time
+        self._previous_camera_position.set(
+            self._camera_position.x, self._camera_position.y)
+        profiler = self.profiler
+
+        start = profiler.mark()
+        self._update_entities()
+        start = profiler.record("entities", start)
+
+        if self.components.count:
+            self.update_components(delta_time)
+            start = profiler.record("movement", start)
+        self._sprites.update()
+        start = profiler.record("sprites", start)
+        self._camera_follow()
+        profiler.record("camera", start)
+
+        self._scene_time_counter += delta_time
+
+        if self.is_interpolating:
+            self._end_interpolation_step()
+
+    def _draw(self):
+        start = self.profiler.mark()
+        self._screen.fill(self.void_color)
+
+        camera_position = self._camera_position
+        if self.is_interpolating:
+            previous = self._previous_camera_position
+            alpha = self.interpolation_alpha
+            self._sprites.camera_offset = (int(lerp(previous.x, camera_position.x, alpha)),
+                                           int(lerp(previous.y, camera_position.y, alpha)))
+        else:
+            self._sprites.camera_offset = camera_position.get_integer_tuple()
+        self._sprites.draw(self._screen)
+        self.profiler.record("draw", start)
+
+        self.profiler.draw_overlay(self._screen)
+
+    def add_moved_sprite_entity(self, entity: "Entity"):
+        """
+        Marks entity with sprite as moved in current simulation step.
+
+        Used by SpriteMixin for interpolation of sprites
+        """
+        self._moved_sprite_entities[entity] = None
+
+    def remove_sprite_entity(self, entity: "Entity"):
+        """
+        Stops interpolation of entity sprite
+        """
+        self._moved_sprite_entities.pop(entity, None)
+        self._interpolated_sprite_entities.pop(entity, None)
+
+    def _end_interpolation_step(self):
+        """
+        Sprites of entities, moved in this step, are interpolated between old and new positions until next step.
+        Entities, which stopped, are placed to their positions
+        """
+        for entity in self._interpolated_sprite_entities:
+            if entity not in self._moved_sprite_entities:
+                entity.end_sprite_interpolation()
+
+        for entity in self._moved_sprite_entities:
+            entity.start_sprite_interpolation()
+
+        self._interpolated_sprite_entities = self._moved_sprite_entities
+        self._moved_sprite_entities = dict()
+
+    def _interpolate_sprites(self):
+        for entity in self._interpolated_sprite_entities:
+            entity.interpolate_sprite(self.interpolation_alpha)
+
+    def _snap_interpolated_sprites(self):
+        for entity in list(self._interpolated_sprite_entities) + list(self._moved_sprite_entities):
+            entity.end_sprite_interpolation()
+
+        self._interpolated_sprite_entities = dict()
+        self._moved_sprite_entities = dict()
+
     def _update_entities(self):
         """
         Updates all enabled entities
 
         """
+        self._find_collision_candidates()
+
+        if self.profiler.is_profiling_callbacks:
+            for entity in self.enabled_entities:
+                entity._update_with_profiling(self.delta_time, self.profiler)
+            return
+
         for entity in self.enabled_entities:
             entity._update(self.delta_time)
 
@@ -218,14 +518,15 @@ class Game:
         If follow entity is None, camera will remain in the same position
         """
         if not self._camera_follow_object is None:
-            self._camera_position = Vector2.lerp(
-                self._camera_position,
-                self._camera_follow_object.position
-                - Vector2(
-                    self._screen.get_width() /
-                    2, self._screen.get_height() / 2
-                ),
-                self.camera_follow_smooth_coefficient,
+            # Camera position is owned by game, so it is changed in place
+            target = self._camera_follow_object.position
+            t = damp(self.camera_follow_smooth_coefficient, self.delta_time)
+
+            self._camera_position.set(
+                lerp(self._camera_position.x, target.x -
+                     self._screen.get_width() / 2, t),
+                lerp(self._camera_position.y, target.y -
+                     self._screen.get_height() / 2, t)
             )
 
     @property
@@ -244,6 +545,21 @@ class Game:
         """
         self._sprites.add(sprite)
 
+    def update_sprite_position(self, sprite: pygame.sprite.Sprite):
+        """
+        Updates position of world space sprite for culling.
+
+        Needs to be called after changing rect of sprite
+        """
+        self._sprites.update_sprite_position(sprite)
+
+    @property
+    def render_stats(self) -> Tuple[int, int]:
+        """
+        Count of drawn and culled sprites in last frame
+        """
+        return (self._sprites.drawn_sprites_count, self._sprites.culled_sprites_count)
+
     def add_entity(self, entity):
         """
         Adding entity in game
@@ -251,6 +567,25 @@ class Game:
         self._enabled_entities[self._entity_counter] = entity
         entity.id = self._entity_counter
         self._entity_counter += 1
+        self._register_entity_type(entity)
+        self.update_entity_position(entity)
+
+    @property
+    def last_entity_id(self) -> int:
+        """
+        Id of last added entity (ids of entities only grow), -1 if no entities were added
+        """
+        return self._entity_counter - 1
+
+    def get_enabled_entities_after(self, entity_id: int) -> List["Entity"]:
+        """
+        Enabled entities, which were added after entity with entity_id.
+
+        Only ids of newer entities are checked, so it costs as much as entities were added since then
+        """
+        enabled_entities = self._enabled_entities
+        return [enabled_entities[new_id] for new_id in range(max(entity_id + 1, 0), self._entity_counter)
+                if new_id in enabled_entities]
 
     def disable_entity(self, entity):
         """
@@ -261,6 +596,8 @@ class Game:
         if entity.id in self._enabled_entities.keys():
             self._disabled_entities[entity.id] = self._enabled_entities[entity.id]
             del self._enabled_entities[entity.id]
+            self._unregister_entity_type(entity)
+            self._collisions_broad_phase.set_enabled(entity.id, False)
 
     def enable_entity(self, entity):
         """
@@ -271,16 +608,183 @@ class Game:
         if entity.id in self._disabled_entities.keys():
             self._enabled_entities[entity.id] = self._disabled_entities[entity.id]
             del self._disabled_entities[entity.id]
+            self._register_entity_type(entity)
+            self._collisions_broad_phase.set_enabled(entity.id, True)
 
     def delete_entity(self, entity_id: int):
         """
         Adds entity into pool for deleting
         """
         if entity_id in self._enabled_entities.keys():
+            self._unregister_entity_type(self._enabled_entities[entity_id])
             del self._enabled_entities[entity_id]
-        elif entity_id in self._enabled_entities.keys():
+        elif entity_id in self._disabled_entities.keys():
             del self._disabled_entities[entity_id]
 
+        self._entities_grid.remove(entity_id)
+
+    def update_entity_position(self, entity: "Entity"):
+        """
+        Adds entity in grid of entities positions, or moves it to new position.
+
+        Called by Entity on every position change
+        """
+        position = entity.position
+        self._entities_grid.update_point(
+            entity.id, entity, position.x, position.y)
+
+    def query_radius(self, center: Vector2, radius: float, kind: Union[type, None] = None) -> Iterator["Entity"]:
+        """
+        Lazily yields enabled entities, which positions are not farther than radius from center.
+
+        If kind is set, only instances of kind are yielded.
+
+        Entities are found in grid of entities positions and compared by squared distance,
+        so only entities near center are checked. Entities can be created and destroyed while iterating
+        """
+        grid = self._entities_grid
+        left, top = grid.get_point_cell(center.x - radius, center.y - radius)
+        right, bottom = grid.get_point_cell(
+            center.x + radius, center.y + radius)
+
+        center_x = center.x
+        center_y = center.y
+        radius_squared = radius * radius
+        enabled_entities = self._enabled_entities
+
+        for entity in grid.query_range((left, top, right, bottom)):
+            if entity.id not in enabled_entities:
+                continue
+
+            if kind is not None and not isinstance(entity, kind):
+                continue
+
+            position = entity.position
+            dx = position.x - center_x
+            dy = position.y - center_y
+            if dx * dx + dy * dy <= radius_squared:
+                yield entity
+
+    def update_collider(self, entity: "CollisionMixin"):
+        """
+        Adds collider of entity in colliders grid, or moves it to new position.
+
+        Called by CollisionMixin on every position change
+        """
+        rect = entity.collider_rect
+        if entity.is_static_collider:
+            self._static_colliders_grid.update(entity.id, entity, rect)
+        else:
+            self._colliders_grid.update(entity.id, entity, rect)
+
+        broad_phase = self._collisions_broad_phase
+        if entity.id in broad_phase:
+            broad_phase.update(entity.id, rect)
+        else:
+            broad_phase.add(entity.id, entity, rect, entity.is_check_collision,
+                            entity.id in self._enabled_entities, entity.is_static_collider)
+
+    def update_components(self, delta_time: float):
+        """
+        Moves entities in component store and updates their colliders all at once.
+
+        Store skips update_collider for entities, which it moves (see CollisionMixin._on_position_changed),
+        their rects are computed by ComponentStore.get_aabbs in one pass
+        """
+        moved_slots = self.components.update(delta_time)
+        entities, rects = self.components.get_aabbs(moved_slots)
+        if not entities:
+            return
+
+        static = [index for index, entity in enumerate(entities)
+                  if entity.is_static_collider]
+        if static:
+            # Static colliders are kept in their own grid and are not expected to move, so they are updated one by one
+            for index in static:
+                self.update_collider(entities[index])
+
+            dynamic = np.setdiff1d(np.arange(len(entities)), static)
+            entities = [entities[index] for index in dynamic.tolist()]
+            rects = rects[dynamic]
+
+        keys = [entity.id for entity in entities]
+        self._colliders_grid.update_many(keys, entities, rects)
+        self._collisions_broad_phase.update_many(keys, rects)
+
+    def remove_collider(self, entity: "CollisionMixin"):
+        """
+        Removes collider of entity from colliders grid
+        """
+        self._colliders_grid.remove(entity.id)
+        self._static_colliders_grid.remove(entity.id)
+        self._collisions_broad_phase.remove(entity.id)
+
+    def set_collider_checking(self, entity: "CollisionMixin", is_check_collision: bool):
+        """
+        Called by CollisionMixin, when is_check_collision of entity is changed
+        """
+        self._collisions_broad_phase.set_checking(
+            entity.id, is_check_collision)
+
+    def _find_collision_candidates(self):
+        """
+        Runs broad phase of collisions for all colliders.
+
+        Called once per frame before entities updates
+        """
+        candidates = self._collision_candidates = dict()
+
+        for first, second in self._collisions_broad_phase.find_pairs(self._get_collider_margin):
+            if first.is_check_collision:
+                candidates.setdefault(first.id, list()).append(second)
+            if second.is_check_collision:
+                candidates.setdefault(second.id, list()).append(first)
+
+    def _get_collider_margin(self, entity: "CollisionMixin") -> float:
+        """
+        How far collider of not static entity can move in this frame.
+
+        Pairs are found before entities are updated, so colliders are inflated by this distance,
+        otherwise colliders, which move into each other in this frame, would not be paired
+        """
+        margin = self.COLLISIONS_BROAD_PHASE_MARGIN
+
+        velocity = getattr(entity, "velocity", None)
+        if velocity is not None:
+            margin += (abs(velocity.x) + abs(velocity.y)) * self.delta_time
+
+        return margin
+
+    def get_collision_candidates(self, entity: "CollisionMixin") -> List["CollisionMixin"]:
+        """
+        Enabled colliders, which could overlap collider of entity in this frame (see _get_collider_margin).
+
+        Colliders could move in this frame, so they are not guaranteed to intersect collider of entity now
+        """
+        candidates = self._collision_candidates.get(entity.id)
+        if candidates is None:
+            return []
+
+        return [candidate for candidate in candidates
+                if candidate.id in self._enabled_entities and candidate._is_collider_registered]
+
+    def query_colliders(self, rect: pygame.Rect, include_disabled=False) -> Iterator["CollisionMixin"]:
+        """
+        Yields enabled entities with colliders (static and not static) from grid cells, covered by rect.
+        If include_disabled is True, disabled entities are yielded too.
+
+        Yielded colliders are not guaranteed to intersect rect
+        """
+        enabled_entities = self._enabled_entities
+
+        for entity in self._colliders_grid.query(rect):
+            if include_disabled or entity.id in enabled_entities:
+                yield entity
+
+        for entity in self._static_colliders_grid.query(rect):
+            if include_disabled or entity.id in enabled_entities:
+                yield entity
+
     def from_screen_to_world_point(self, on_screen_point: Vector2) -> Vector2:
         return on_screen_point + self._camera_position
 
@@ -0,0 +1,254 @@
+"""
+Structure-of-arrays store of movement and collider components.
+
+Used by VelocityMixin for entities with USE_COMPONENT_STORE = True.
+"""
+from typing import Dict, List, Tuple, TYPE_CHECKING, Union
+
+from .math import Vector2, damp
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ..entities.entity import Entity
+
+
+class ComponentVector(Vector2):
+    """
+    Vector2, which is a view into position or velocity of one entity in ComponentStore.
+
+    Changing x and y changes array of store. Values are also kept in vector for fast reading,
+    store updates them, when it changes arrays by itself.
+    When entity is removed from store, vector is detached and keeps last values
+    """
+    __slots__ = ('_array', '_slot', '_x', '_y')
+
+    def __init__(self, array: np.ndarray, slot: int) -> None:
+        # Replaced by store, when it grows
+        self._array = array
+        self._slot = slot
+        self._x, self._y = array[slot].tolist()
+
+    @property
+    def x(self) -> float:
+        return self._x
+
+    @x.setter
+    def x(self, value: float):
+        self._x = value
+
+        if self._array is not None:
+            self._array[self._slot, 0] = value
+
+    @property
+    def y(self) -> float:
+        return self._y
+
+    @y.setter
+    def y(self, value: float):
+        self._y = value
+
+        if self._array is not None:
+            self._array[self._slot, 1] = value
+
+    def set(self, x: float, y: float) -> "Vector2":
+        self._x = x
+        self._y = y
+
+        if self._array is not None:
+            self._array[self._slot] = (x, y)
+        return self
+
+    def detach(self):
+        """
+        Stops being view into store, keeping current values
+        """
+        self._array = None
+
+
+class ComponentStore:
+    """
+    Positions, velocities, velocity regress strengths, kinematic flags and collider half-extents
+    of entities in NumPy arrays (structure of arrays). Every entity takes one slot, slots of removed entities are reused.
+
+    update() moves all enabled entities in one vectorized pass (like VelocityMixin, but for all entities at once)
+    and calls _on_position_changed() only for entities, which moved.
+    Colliders of moved entities are not updated one by one: get_aabbs() computes their rects in one pass,
+    and Game updates colliders grid and broad phase with them (see Game.update_components)
+
+    Every Game has one store in Game.components
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self) -> None:
+        self.positions = np.zeros((0, 2))
+        self.velocities = np.zeros((0, 2))
+        self.regress_strengths = np.zeros(0)
+        self.kinematic = np.zeros(0, dtype=bool)
+        self.half_extents = np.zeros((0, 2))
+        # Slot is taken by entity / entity is enabled
+        self.used = np.zeros(0, dtype=bool)
+        self.enabled = np.zeros(0, dtype=bool)
+        self._grow(self.INITIAL_CAPACITY)
+
+        self._entities: List["Entity"] = [None] * self.capacity
+        # Views of positions and velocities by slot
+        self._position_views: List[ComponentVector] = [None] * self.capacity
+        self._velocity_views: List[ComponentVector] = [None] * self.capacity
+        self._free_slots: List[int] = list(range(self.capacity - 1, -1, -1))
+        # Entity id -> slot
+        self._slots: Dict[int, int] = dict()
+        # Entity, which _on_position_changed() is called by update() now
+        self.moving_entity: "Entity" = None
+
+    @property
+    def capacity(self) -> int:
+        return len(self.used)
+
+    @property
+    def count(self) -> int:
+        return len(self._slots)
+
+    def _grow(self, new_capacity: int):
+        added = new_capacity - self.capacity
+
+        self.positions = np.concatenate((self.positions, np.zeros((added, 2))))
+        self.velocities = np.concatenate((self.velocities, np.zeros((added, 2))))
+        self.regress_strengths = np.concatenate(
+            (self.regress_strengths, np.zeros(added)))
+        self.kinematic = np.concatenate(
+            (self.kinematic, np.zeros(added, dtype=bool)))
+        self.half_extents = np.concatenate(
+            (self.half_extents, np.zeros((added, 2))))
+        self.used = np.concatenate((self.used, np.zeros(added, dtype=bool)))
+        self.enabled = np.concatenate(
+            (self.enabled, np.zeros(added, dtype=bool)))
+
+    def add(self, entity: "Entity", position: Vector2, velocity: Vector2) -> Tuple[ComponentVector, ComponentVector]:
+        """
+        Takes slot for entity. Returns views of position and velocity of entity in store
+        """
+        if not self._free_slots:
+            old_capacity = self.capacity
+            self._grow(old_capacity * 2)
+            self._entities += [None] * old_capacity
+            self._position_views += [None] * old_capacity
+            self._velocity_views += [None] * old_capacity
+
+            # Arrays are new, views need to look into them
+            for view in self._position_views:
+                if view is not None:
+                    view._array = self.positions
+            for view in self._velocity_views:
+                if view is not None:
+                    view._array = self.velocities
+            self._free_slots = list(
+                range(self.capacity - 1, old_capacity - 1, -1))
+
+        slot = self._free_slots.pop()
+        self._slots[entity.id] = slot
+        self._entities[slot] = entity
+
+        self.positions[slot] = (position.x, position.y)
+        self.velocities[slot] = (velocity.x, velocity.y)
+        self.regress_strengths[slot] = 0.0
+        self.kinematic[slot] = True
+        self.half_extents[slot] = (0.0, 0.0)
+        self.used[slot] = True
+        self.enabled[slot] = True
+
+        position_view = self._position_views[slot] = ComponentVector(
+            self.positions, slot)
+        velocity_view = self._velocity_views[slot] = ComponentVector(
+            self.velocities, slot)
+
+        return position_view, velocity_view
+
+    def remove(self, entity: "Entity"):
+        slot = self._slots.pop(entity.id, None)
+        if slot is None:
+            return
+
+        self.used[slot] = False
+        self.enabled[slot] = False
+        self._entities[slot] = None
+        self._free_slots.append(slot)
+
+        self._position_views[slot].detach()
+        self._velocity_views[slot].detach()
+        self._position_views[slot] = None
+        self._velocity_views[slot] = None
+
+    def get_slot(self, entity: "Entity") -> int:
+        return self._slots[entity.id]
+
+    def set_enabled(self, entity: "Entity", enabled: bool):
+        slot = self._slots.get(entity.id)
+        if slot is not None:
+            self.enabled[slot] = enabled
+
+    def set_collider_size(self, entity: "Entity", collider_size: Vector2):
+        slot = self._slots.get(entity.id)
+        if slot is not None:
+            self.half_extents[slot] = (collider_size.x / 2, collider_size.y / 2)
+
+    def update(self, delta_time: float) -> np.ndarray:
+        """
+        Movement system. Moves enabled entities by their velocities (in pixels per second)
+        and slows down velocities of not kinematic ones, like VelocityMixin.
+
+        Returns slots of moved entities
+        """
+        moving = np.flatnonzero(self.enabled & (self.velocities != 0).any(axis=1))
+        if len(moving) == 0:
+            return moving
+
+        self.positions[moving] += self.velocities[moving] * delta_time
+
+        regressing = moving[~self.kinematic[moving]]
+        if len(regressing):
+            kept_parts = 1 - damp(self.regress_strengths[regressing], delta_time)
+            self.velocities[regressing] *= kept_parts[:, None]
+
+        # Values in views are updated from arrays. Columns are converted separately, it is much faster
+        velocity_views = self._velocity_views
+        for slot, x, y in zip(regressing.tolist(), self.velocities[regressing, 0].tolist(),
+                              self.velocities[regressing, 1].tolist()):
+            velocity = velocity_views[slot]
+            velocity._x = x
+            velocity._y = y
+
+        position_views = self._position_views
+        entities = self._entities
+        for slot, x, y in zip(moving.tolist(), self.positions[moving, 0].tolist(),
+                              self.positions[moving, 1].tolist()):
+            position = position_views[slot]
+            position._x = x
+            position._y = y
+
+            entity = self.moving_entity = entities[slot]
+            entity._on_position_changed()
+
+        self.moving_entity = None
+        return moving
+
+    def get_aabbs(self, slots: Union[np.ndarray, None] = None) -> Tuple[List["Entity"], np.ndarray]:
+        """
+        Collider rects of enabled entities with colliders (only from slots, if they are set), computed in one pass.
+
+        Returns entities and int array of (left, top, width, height) rows, rounded like CollisionMixin.collider_rect
+        """
+        if slots is None:
+            slots = np.flatnonzero(self.enabled)
+        slots = slots[self.enabled[slots] & (self.half_extents[slots] != 0).any(axis=1)]
+
+        positions = self.positions[slots]
+        half_extents = self.half_extents[slots]
+        rects = np.empty((len(slots), 4), dtype=np.int64)
+        # astype truncates to zero, like int()
+        rects[:, :2] = (positions - half_extents).astype(np.int64)
+        rects[:, 2:] = (half_extents * 2).astype(np.int64)
+
+        entities = self._entities
+        return [entities[slot] for slot in slots.tolist()], rects
@@ -4,7 +4,6 @@ Classes for drawing sprites/sprite animations/etc
 from typing import List, Tuple, Union
 
 from ..game import Game
-from ..utils.math import Vector2
 
 import pygame
 
@@ -20,6 +19,11 @@ class BaseSprite(pygame.sprite.Sprite):
     Automatically registering new sprite in game
     """
 
+    # Is rect of sprite in world coordinates (drawn with camera offset)
+    IS_WORLD_SPACE = False
+    # Does sprite draw many images through get_blits() instead of its image
+    IS_BATCH = False
+
     def __init__(self, image: pygame.Surface, layer=0, start_position=(0, 0)) -> None:
         """
         Initializing new sprite.
@@ -136,24 +140,17 @@ class SpriteWithCameraOffset(BaseSprite):
     """
     Combining position of sprite and camera position.
 
+    Rect of this sprite is in world space. Camera position is applied by sprites group of game at draw time.
+
     Based on BaseSprite
     """
 
+    IS_WORLD_SPACE = True
+
     def __init__(self, image, layer=0, start_position=(0, 0)) -> None:
         super().__init__(image, layer, start_position)
         self.base_position = start_position
 
-    def update(self) -> None:
-        """
-        Updates sprite position depending on camera position
-        """
-        super().update()
-
-        self.rect.center = (
-            Vector2(self.base_position[0], self.base_position[1])
-            - self.game._camera_position
-        ).get_integer_tuple()
-
     @property
     def center_position(self) -> Tuple[int, int]:
         return self.base_position
@@ -161,11 +158,37 @@ class SpriteWithCameraOffset(BaseSprite):
     @center_position.setter
     def center_position(self, position: Tuple[int, int]):
         self.base_position = position
+        self.rect.center = position
+        self.game.update_sprite_position(self)
+
+
+class BatchSprite(BaseSprite):
+    """
+    Sprite, which draws many images at once on its layer.
+
+    Sprites group calls get_blits() at draw time instead of drawing image of this sprite.
+    """
+
+    IS_BATCH = True
+
+    def __init__(self, layer=0) -> None:
+        super().__init__(pygame.Surface((0, 0)), layer)
+
+    def get_blits(self, camera_offset: Tuple[int, int], viewport: pygame.Rect) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        """
+        List of (image, screen position) pairs to draw.
+
+        viewport - rect of camera view in world (with culling margin)
+        """
+        raise NotImplementedError("get_blits() needs to be implemented")
 
 
 class FontSprite(BaseSprite):
     """
-    Sprite for printing text
+    Sprite for printing text.
+
+    Text is drawn from its position to the right and down,
+    so rect of this sprite is anchored by top left corner and is resized with text
     """
 
     def __init__(self, text: str, color: Tuple[int, int, int], font: pygame.font.Font, layer=0, start_position=(0, 0)) -> None:
@@ -188,6 +211,19 @@ class FontSprite(BaseSprite):
 
         self.image = new_text_surface
 
+        # Rect is used for culling, so it needs to be the size of text
+        self.rect.size = text_size
+        self.game.update_sprite_position(self)
+
+    @property
+    def center_position(self) -> Tuple[int, int]:
+        return self.rect.topleft
+
+    @center_position.setter
+    def center_position(self, position: Tuple[int, int]):
+        self.rect.topleft = position
+        self.game.update_sprite_position(self)
+
     def set_font(self, new_font: pygame.font.Font):
         """
         Sets font of this spritee
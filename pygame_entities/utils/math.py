@@ -6,13 +6,53 @@ class Vector2:
     """
     Class for 2-dimensional vector.
 
-    Handles operators like + - * /
+    Handles operators like + - * /, they always return new vector.
+
+    Methods iadd, isub, imul and set change vector in place without creating new objects.
+    Use them only for vectors, which are not shared with other objects
+    (for example, do not change position of entity in place, assign new vector instead)
     """
+    __slots__ = ('x', 'y')
 
     def __init__(self, x=0.0, y=0.0) -> None:
         self.x = x
         self.y = y
 
+    def set(self, x: float, y: float) -> "Vector2":
+        """
+        Sets x and y in place. Returns this vector
+        """
+        self.x = x
+        self.y = y
+        return self
+
+    def iadd(self, other: "Vector2") -> "Vector2":
+        """
+        Adds other vector in place. Returns this vector
+        """
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def isub(self, other: "Vector2") -> "Vector2":
+        """
+        Subtracts other vector in place. Returns this vector
+        """
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def imul(self, other: Union[int, float]) -> "Vector2":
+        """
+        Multiplies by number in place. Returns this vector
+        """
+        self.x *= other
+        self.y *= other
+        return self
+
+    def copy(self) -> "Vector2":
+        return Vector2(self.x, self.y)
+
     @staticmethod
     def from_tuple(xy: Tuple[Union[float, int], Union[float, int]]) -> "Vector2":
         """
@@ -53,7 +93,27 @@ class Vector2:
         """
         Length of vector
         """
-        return math.sqrt(self.x**2 + self.y**2)
+        return math.sqrt(self.x * self.x + self.y * self.y)
+
+    def magnitude_squared(self) -> float:
+        """
+        Squared length of vector. Faster than magnitude(), use it for comparing lengths
+        """
+        return self.x * self.x + self.y * self.y
+
+    def distance_to(self, other: "Vector2") -> float:
+        """
+        Distance between this and other point
+        """
+        return math.hypot(self.x - other.x, self.y - other.y)
+
+    def distance_squared_to(self, other: "Vector2") -> float:
+        """
+        Squared distance between this and other point
+        """
+        dx = self.x - other.x
+        dy = self.y - other.y
+        return dx * dx + dy * dy
 
     def normalized(self) -> "Vector2":
         """
@@ -94,6 +154,16 @@ def lerp(a: float, b: float, t: float) -> float:
     return (1 - t) * a + t * b
 
 
+def damp(t: float, delta_time: float, reference_delta_time: float = 1 / 60) -> float:
+    """
+    Converts lerp coef t, which is applied once per frame of reference_delta_time,
+    to coef for frame of delta_time.
+
+    Lerps with converted coefs give the same result for any frame rate.
+    """
+    return 1 - (1 - t) ** (delta_time / reference_delta_time)
+
+
 def clamp(x: Union[float, int], minimum: Union[float, int], maximum: Union[float, int]) -> Union[float, int]:
     """
     Clamping x between minimum and maximum.
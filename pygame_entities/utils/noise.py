@@ -0,0 +1,115 @@
+"""
+Vectorized noise functions based on NumPy.
+
+Every function works with whole arrays of coordinates at once
+and returns the same values for the same coordinates and seed,
+no matter how coordinates are split into arrays.
+"""
+import numpy as np
+
+# Size of permutation table. Noise repeats every PERIOD units
+PERIOD = 256
+
+
+def _get_tables(seed: int):
+    """
+    Permutation table and gradient vectors for seed
+    """
+    rng = np.random.default_rng(seed)
+    permutation = rng.permutation(PERIOD)
+    angles = rng.uniform(0, 2 * np.pi, PERIOD)
+
+    return permutation, np.cos(angles), np.sin(angles)
+
+
+def _fade(t: np.ndarray) -> np.ndarray:
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def perlin_noise(x: np.ndarray, y: np.ndarray, seed: int) -> np.ndarray:
+    """
+    2D gradient (Perlin) noise in points (x, y).
+
+    Returns array with shape of x with values about in range [-0.7, 0.7].
+    In points with integer coordinates noise is always 0
+    """
+    permutation, gradients_x, gradients_y = _get_tables(seed)
+
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    dx = x - x0
+    dy = y - y0
+    x0 = x0.astype(np.int64)
+    y0 = y0.astype(np.int64)
+
+    def dot_gradient(cell_x, cell_y, offset_x, offset_y):
+        gradient_index = permutation[(permutation[cell_x % PERIOD] + cell_y) % PERIOD]
+        return gradients_x[gradient_index] * offset_x + gradients_y[gradient_index] * offset_y
+
+    n00 = dot_gradient(x0, y0, dx, dy)
+    n10 = dot_gradient(x0 + 1, y0, dx - 1, dy)
+    n01 = dot_gradient(x0, y0 + 1, dx, dy - 1)
+    n11 = dot_gradient(x0 + 1, y0 + 1, dx - 1, dy - 1)
+
+    u = _fade(dx)
+    v = _fade(dy)
+
+    top = n00 + u * (n10 - n00)
+    bottom = n01 + u * (n11 - n01)
+    return top + v * (bottom - top)
+
+
+def fractal_noise(x: np.ndarray, y: np.ndarray, seed: int, octaves: int = 1, persistence=0.5, lacunarity=2.0) -> np.ndarray:
+    """
+    Sum of `octaves` layers of perlin noise.
+
+    Every next layer has frequency multiplied by lacunarity, and amplitude multiplied by persistence.
+    Result is normalized to range of one layer
+    """
+    result = np.zeros(np.shape(x))
+    amplitude = 1.0
+    frequency = 1.0
+    amplitudes_sum = 0.0
+
+    for octave in range(octaves):
+        result += perlin_noise(x * frequency, y * frequency,
+                               seed + octave) * amplitude
+        amplitudes_sum += amplitude
+        amplitude *= persistence
+        frequency *= lacunarity
+
+    return result / amplitudes_sum
+
+
+def quantize(values: np.ndarray, levels: int) -> np.ndarray:
+    """
+    Converts values from range [0, 1) into indexes from 0 to levels - 1.
+
+    Values out of range are clamped. Returns array of uint8
+    """
+    return np.clip(np.floor(values * levels), 0, levels - 1).astype(np.uint8)
+
+
+def generate_levels(seed: int, origin, size, scale: float, offset: float, levels: int, frequency=1.0, octaves=1) -> np.ndarray:
+    """
+    Quantized fractal noise for rectangle of integer grid.
+
+    origin - (x, y) of left top point, size - (width, height) of rectangle.
+    Noise is sampled in points ((x * scale + 0.1) * frequency, (y * scale + 0.1) * frequency),
+    because in points with integer coordinates perlin noise is always 0.
+
+    Returns array of uint8 with shape (height, width).
+    Value in every point depends only on its coordinates and parameters,
+    so rectangles can be generated separately (even in different processes) and combined
+    """
+    ys, xs = np.mgrid[origin[1]:origin[1] + size[1],
+                      origin[0]:origin[0] + size[0]]
+
+    noise = fractal_noise(
+        (xs * scale + 0.1) * frequency,
+        (ys * scale + 0.1) * frequency,
+        seed,
+        octaves
+    )
+
+    return quantize(noise + offset, levels)
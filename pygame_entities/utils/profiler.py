@@ -0,0 +1,301 @@
+"""
+Frame profiler of Game
+"""
+import csv
+import json
+from collections import deque
+from math import ceil
+from time import perf_counter
+from typing import Deque, Dict, List, Tuple, Union
+
+import pygame
+
+
+class ProfiledFrame:
+    """
+    Timings of one frame.
+
+    sections - (name, start, duration) of game loop phases in order of running.
+    callbacks - total duration and count of calls of update callbacks, grouped by "EntityClass.method"
+    """
+    __slots__ = ('start', 'duration', 'sections', 'callbacks')
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.duration = 0.0
+        self.sections: List[Tuple[str, float, float]] = list()
+        self.callbacks: Dict[str, List[float]] = dict()
+
+    def get_totals(self) -> Dict[str, float]:
+        """
+        Total duration of every section and callbacks group in this frame
+        """
+        totals = {"frame": self.duration}
+
+        for name, _, duration in self.sections:
+            totals[name] = totals.get(name, 0) + duration
+
+        for name, (duration, _) in self.callbacks.items():
+            totals[name] = duration
+
+        return totals
+
+
+class FrameProfiler:
+    """
+    Measures time of game loop phases (events, entities, sprites, camera, draw, flip, tick)
+    and, if profile_callbacks is True, time of every update callback of entities, grouped by entity class and method.
+
+    Keeps last HISTORY_SIZE frames for rolling averages and p99,
+    draws them in overlay and exports them to CSV or Chrome trace JSON (chrome://tracing, Perfetto).
+
+    Does nothing while disabled. Showing overlay enables profiler
+    """
+
+    HISTORY_SIZE = 300
+    # How often (in seconds) overlay text is rerendered
+    OVERLAY_REFRESH_INTERVAL = 0.5
+    # How many slowest callbacks groups are shown in overlay
+    OVERLAY_CALLBACKS_COUNT = 8
+    OVERLAY_FONT_SIZE = 20
+    OVERLAY_TEXT_COLOR = (255, 255, 255)
+    OVERLAY_BACKGROUND_COLOR = (0, 0, 0, 180)
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.profile_callbacks = False
+        self.overlay_visible = False
+
+        self._frames: Deque[ProfiledFrame] = deque(maxlen=self.HISTORY_SIZE)
+        self._current_frame: Union[ProfiledFrame, None] = None
+        # (entity class, function) -> name of callbacks group
+        self._callback_names: Dict[Tuple[type, object], str] = dict()
+
+        self._overlay_surface: Union[pygame.Surface, None] = None
+        self._overlay_rendered_time = 0.0
+        self._font: Union[pygame.font.Font, None] = None
+
+    @property
+    def frames(self) -> List[ProfiledFrame]:
+        return list(self._frames)
+
+    def clear(self):
+        self._frames.clear()
+        self._current_frame = None
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+
+        if self.overlay_visible:
+            self.enabled = True
+
+    def begin_frame(self):
+        if not self.enabled:
+            self._current_frame = None
+            return
+
+        self._current_frame = ProfiledFrame(perf_counter())
+
+    def end_frame(self):
+        frame = self._current_frame
+        if frame is None:
+            return
+
+        frame.duration = perf_counter() - frame.start
+        self._frames.append(frame)
+        self._current_frame = None
+
+    def mark(self) -> float:
+        """
+        Start time for record(). Returns 0, if profiler is disabled
+        """
+        if self._current_frame is None:
+            return 0.0
+
+        return perf_counter()
+
+    def record(self, name: str, start: float) -> float:
+        """
+        Records section, which started at start (from mark() or previous record()), and ended now.
+
+        Returns current time, so it can be used as start of next section
+        """
+        if self._current_frame is None:
+            return 0.0
+
+        now = perf_counter()
+        self._current_frame.sections.append((name, start, now - start))
+
+        return now
+
+    @property
+    def is_profiling_callbacks(self) -> bool:
+        return self.profile_callbacks and self._current_frame is not None
+
+    def record_callback(self, entity: object, function, duration: float):
+        """
+        Adds duration of one call of update callback of entity
+        """
+        key = (entity.__class__, getattr(function, "__func__", function))
+        name = self._callback_names.get(key)
+
+        if name is None:
+            function_name = getattr(function, "__name__", function.__class__.__name__)
+            name = self._callback_names[key] = f"{entity.__class__.__name__}.{function_name}"
+
+        group = self._current_frame.callbacks.get(name)
+        if group is None:
+            self._current_frame.callbacks[name] = [duration, 1]
+        else:
+            group[0] += duration
+            group[1] += 1
+
+    def get_stats(self) -> Dict[str, Tuple[float, float]]:
+        """
+        Rolling average and p99 of durations (in seconds) per frame of frame, every section and callbacks group.
+
+        Frames, in which section or group was not running, are counted with zero duration
+        """
+        frames_totals = [frame.get_totals() for frame in self._frames]
+        if not frames_totals:
+            return dict()
+
+        names = dict()
+        for totals in frames_totals:
+            names.update(dict.fromkeys(totals.keys()))
+
+        p99_index = max(ceil(len(frames_totals) * 0.99) - 1, 0)
+        stats = dict()
+
+        for name in names:
+            durations = sorted(totals.get(name, 0.0)
+                               for totals in frames_totals)
+            stats[name] = (sum(durations) / len(durations),
+                           durations[p99_index])
+
+        return stats
+
+    def draw_overlay(self, surface: pygame.Surface):
+        """
+        Draws overlay with stats in top left corner of surface
+        """
+        if not self.overlay_visible:
+            return
+
+        now = perf_counter()
+        if self._overlay_surface is None or now - self._overlay_rendered_time >= self.OVERLAY_REFRESH_INTERVAL:
+            self._overlay_surface = self._render_overlay()
+            self._overlay_rendered_time = now
+
+        surface.blit(self._overlay_surface, (0, 0))
+
+    def _get_overlay_lines(self) -> List[str]:
+        stats = self.get_stats()
+        if not stats:
+            return ["Profiler: no frames yet"]
+
+        frame_avg, frame_p99 = stats.pop("frame")
+        fps = 1 / frame_avg if frame_avg > 0 else 0
+        lines = [f"Frame  avg {frame_avg * 1000:6.2f} ms  p99 {frame_p99 * 1000:6.2f} ms  ({fps:.0f} FPS)"]
+
+        sections = dict()
+        for frame in self._frames:
+            sections.update(dict.fromkeys(name for name, _, _ in frame.sections))
+
+        for name in sections:
+            avg, p99 = stats.pop(name)
+            lines.append(f"  {name:<10} avg {avg * 1000:6.2f} ms  p99 {p99 * 1000:6.2f} ms")
+
+        if stats:
+            lines.append("Callbacks:")
+            slowest = sorted(stats.items(), key=lambda item: item[1][0], reverse=True)
+            for name, (avg, p99) in slowest[:self.OVERLAY_CALLBACKS_COUNT]:
+                lines.append(f"  {name:<36} avg {avg * 1000:6.2f} ms  p99 {p99 * 1000:6.2f} ms")
+
+        return lines
+
+    def _render_overlay(self) -> pygame.Surface:
+        if self._font is None:
+            self._font = pygame.font.Font(None, self.OVERLAY_FONT_SIZE)
+
+        lines = [self._font.render(line, True, self.OVERLAY_TEXT_COLOR)
+                 for line in self._get_overlay_lines()]
+        line_height = self._font.get_linesize()
+
+        overlay = pygame.Surface(
+            (max(line.get_width() for line in lines) + 10, line_height * len(lines) + 10), pygame.SRCALPHA)
+        overlay.fill(self.OVERLAY_BACKGROUND_COLOR)
+
+        for index, line in enumerate(lines):
+            overlay.blit(line, (5, 5 + index * line_height))
+
+        return overlay
+
+    def export_csv(self, path: str):
+        """
+        Exports recorded frames to CSV.
+
+        Every row is section or callbacks group of frame: frame, kind, name, start_ms, duration_ms, calls.
+        start_ms is from start of first recorded frame, it is empty for callbacks groups
+        """
+        origin = self._frames[0].start if self._frames else 0.0
+
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "kind", "name",
+                            "start_ms", "duration_ms", "calls"])
+
+            for index, frame in enumerate(self._frames):
+                writer.writerow([index, "frame", "frame", f"{(frame.start - origin) * 1000:.4f}",
+                                 f"{frame.duration * 1000:.4f}", 1])
+
+                for name, start, duration in frame.sections:
+                    writer.writerow([index, "section", name, f"{(start - origin) * 1000:.4f}",
+                                     f"{duration * 1000:.4f}", 1])
+
+                for name, (duration, calls) in frame.callbacks.items():
+                    writer.writerow([index, "callback", name, "",
+                                     f"{duration * 1000:.4f}", calls])
+
+    def export_chrome_trace(self, path: str):
+        """
+        Exports recorded frames to Chrome trace JSON, which can be opened in chrome://tracing or Perfetto.
+
+        Frames and sections are shown on "Game loop" track.
+        Callbacks are grouped, so every group is shown on "Entity callbacks" track as one event
+        with total duration of its calls, one after another from start of entities section
+        """
+        origin = self._frames[0].start if self._frames else 0.0
+
+        def to_us(seconds: float) -> float:
+            return seconds * 1_000_000
+
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": 0, "tid": 0,
+             "args": {"name": "Game loop"}},
+            {"name": "thread_name", "ph": "M", "pid": 0, "tid": 1,
+             "args": {"name": "Entity callbacks"}},
+        ]
+
+        for index, frame in enumerate(self._frames):
+            events.append({"name": "frame", "cat": "frame", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": to_us(frame.start - origin), "dur": to_us(frame.duration),
+                           "args": {"frame": index}})
+
+            callbacks_start = frame.start
+            for name, start, duration in frame.sections:
+                events.append({"name": name, "cat": "section", "ph": "X", "pid": 0, "tid": 0,
+                               "ts": to_us(start - origin), "dur": to_us(duration)})
+
+                if name == "entities" and callbacks_start == frame.start:
+                    callbacks_start = start
+
+            for name, (duration, calls) in frame.callbacks.items():
+                events.append({"name": name, "cat": "callback", "ph": "X", "pid": 0, "tid": 1,
+                               "ts": to_us(callbacks_start - origin), "dur": to_us(duration),
+                               "args": {"calls": calls}})
+                callbacks_start += duration
+
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events,
+                      "displayTimeUnit": "ms"}, f)
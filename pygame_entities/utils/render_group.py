@@ -0,0 +1,123 @@
+"""
+Sprite groups for rendering game world
+"""
+from typing import Dict, Tuple
+
+from .spatial_hash import SpatialHash
+
+import pygame
+
+
+class CameraLayeredUpdates(pygame.sprite.LayeredUpdates):
+    """
+    Layered sprite group, which applies camera translation at draw time.
+
+    Sprites with IS_WORLD_SPACE = True keep world position in their rect,
+    so they are not needed to be moved every frame when camera moves.
+    Other sprites are drawn with their rect as screen position.
+
+    World sprites are stored in spatial hash, so only sprites near camera viewport are drawn (culling).
+
+    Sprites with IS_BATCH = True draw images from their get_blits() on their layer.
+    """
+
+    # Size of one cell of world sprites grid in pixels
+    CULLING_CELL_SIZE = 512
+    # Sprites out of viewport, but closer than this margin, are still drawn
+    CULLING_MARGIN = 128
+
+    def __init__(self, *sprites, **kwargs) -> None:
+        # Used in add_internal, so needs to be created before adding sprites
+        self._world_sprites_grid = SpatialHash(self.CULLING_CELL_SIZE)
+        self._screen_sprites: Dict[pygame.sprite.Sprite, None] = dict()
+        # Order of adding sprites, used for sorting sprites with equal layers
+        self._sprites_order: Dict[pygame.sprite.Sprite, int] = dict()
+        self._sprites_counter = 0
+
+        super().__init__(*sprites, **kwargs)
+
+        # Camera position in world, rounded to int
+        self.camera_offset: Tuple[int, int] = (0, 0)
+
+        # Stats of last draw call
+        self.drawn_sprites_count = 0
+        self.culled_sprites_count = 0
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+
+        self._sprites_order[sprite] = self._sprites_counter
+        self._sprites_counter += 1
+
+        if getattr(sprite, "IS_WORLD_SPACE", False):
+            self._world_sprites_grid.update(sprite, sprite, sprite.rect)
+        else:
+            self._screen_sprites[sprite] = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+
+        self._sprites_order.pop(sprite, None)
+        self._world_sprites_grid.remove(sprite)
+        self._screen_sprites.pop(sprite, None)
+
+    def update_sprite_position(self, sprite: pygame.sprite.Sprite):
+        """
+        Moves world sprite in sprites grid after changing its rect.
+
+        Does nothing if sprite is not in this group
+        """
+        if sprite in self._world_sprites_grid:
+            self._world_sprites_grid.update(sprite, sprite, sprite.rect)
+
+    def get_viewport(self, surface: pygame.Surface) -> pygame.Rect:
+        """
+        Rect of camera viewport in world with culling margin
+        """
+        return pygame.Rect(
+            self.camera_offset[0] - self.CULLING_MARGIN,
+            self.camera_offset[1] - self.CULLING_MARGIN,
+            surface.get_width() + self.CULLING_MARGIN * 2,
+            surface.get_height() + self.CULLING_MARGIN * 2
+        )
+
+    def draw(self, surface: pygame.Surface, bgd=None) -> list:
+        """
+        Draws all visible sprites in one Surface.blits call.
+
+        Returns empty list, because dirty rects are not tracked
+        """
+        offset_x, offset_y = self.camera_offset
+        viewport = self.get_viewport(surface)
+
+        # Empty rect never collides, so it is checked as point
+        visible_sprites = [sprite for sprite in self._world_sprites_grid.query(viewport)
+                           if viewport.colliderect(sprite.rect) or
+                           (not sprite.rect.width or not sprite.rect.height) and viewport.collidepoint(sprite.rect.topleft)]
+        self.drawn_sprites_count = len(visible_sprites) + \
+            len(self._screen_sprites)
+        self.culled_sprites_count = len(self) - self.drawn_sprites_count
+
+        visible_sprites.extend(self._screen_sprites)
+
+        layers = self._spritelayers
+        order = self._sprites_order
+        visible_sprites.sort(key=lambda x: (layers[x], order[x]))
+
+        blits = list()
+
+        for sprite in visible_sprites:
+            rect = sprite.rect
+
+            if sprite in self._screen_sprites:
+                if getattr(sprite, "IS_BATCH", False):
+                    blits.extend(sprite.get_blits(
+                        self.camera_offset, viewport))
+                else:
+                    blits.append((sprite.image, rect))
+            else:
+                blits.append(
+                    (sprite.image, (rect.x - offset_x, rect.y - offset_y)))
+
+        surface.blits(blits, False)
+        return []
@@ -0,0 +1,184 @@
+"""
+Uniform grid spatial index.
+
+Used by Game for fast queries of objects near some rect or point.
+"""
+from typing import Dict, Hashable, Iterator, List, Tuple
+
+import numpy as np
+import pygame
+
+# (left column, top row, right column, bottom row) of cells, covered by rect
+CellRange = Tuple[int, int, int, int]
+
+
+class SpatialHash:
+    """
+    Uniform grid of square cells.
+
+    Every object is stored by key in all cells that its rect covers,
+    so query of some rect touches only cells near this rect, not every stored object.
+
+    Objects that cover more than MAX_CELLS_PER_OBJECT cells (like map borders) are stored separately
+    and returned on every query.
+    """
+
+    MAX_CELLS_PER_OBJECT = 64
+
+    def __init__(self, cell_size: int = 256) -> None:
+        self.cell_size = cell_size
+
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, object]] = dict()
+        self._large_objects: Dict[Hashable, object] = dict()
+        # key -> (object, cell range)
+        self._objects: Dict[Hashable, Tuple[object, CellRange]] = dict()
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._objects
+
+    def get_cell_range(self, rect: pygame.Rect) -> CellRange:
+        """
+        Range of cells, covered by rect
+        """
+        size = self.cell_size
+        return (
+            rect.left // size,
+            rect.top // size,
+            (rect.left + max(rect.width, 1) - 1) // size,
+            (rect.top + max(rect.height, 1) - 1) // size
+        )
+
+    def get_point_cell(self, x: float, y: float) -> Tuple[int, int]:
+        """
+        Cell, which contains point
+        """
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def update(self, key: Hashable, obj: object, rect: pygame.Rect):
+        """
+        Adds object in grid or moves it, if object with this key is already in grid.
+
+        If object stays in the same cells, nothing is changed
+        """
+        self.update_range(key, obj, self.get_cell_range(rect))
+
+    def update_many(self, keys: List[Hashable], objects: List[object], rects: np.ndarray):
+        """
+        Same as update for many objects. rects - int array of (left, top, width, height) rows.
+
+        Cells of all rects are computed in one vectorized pass
+        """
+        size = self.cell_size
+        cell_ranges = np.empty_like(rects)
+        cell_ranges[:, :2] = rects[:, :2] // size
+        cell_ranges[:, 2:] = (rects[:, :2] +
+                              np.maximum(rects[:, 2:], 1) - 1) // size
+
+        update_range = self.update_range
+        for key, obj, cell_range in zip(keys, objects, cell_ranges.tolist()):
+            update_range(key, obj, tuple(cell_range))
+
+    def update_point(self, key: Hashable, obj: object, x: float, y: float):
+        """
+        Same as update, but for object, which is a point (without creating rect)
+        """
+        size = self.cell_size
+        column = int(x // size)
+        row = int(y // size)
+
+        # Fast path for point, which stays in its cell
+        stored = self._objects.get(key)
+        if stored is not None and stored[0] is obj:
+            left, top, right, bottom = stored[1]
+            if left == column and top == row and right == column and bottom == row:
+                return
+
+        self.update_range(key, obj, (column, row, column, row))
+
+    def update_range(self, key: Hashable, obj: object, cell_range: CellRange):
+        """
+        Adds object in cell_range cells or moves it there, if object with this key is already in grid
+        """
+        stored = self._objects.get(key)
+
+        if stored is not None:
+            if stored[1] == cell_range and stored[0] is obj:
+                return
+            self.remove(key)
+
+        self._objects[key] = (obj, cell_range)
+
+        left, top, right, bottom = cell_range
+        if (right - left + 1) * (bottom - top + 1) > self.MAX_CELLS_PER_OBJECT:
+            self._large_objects[key] = obj
+            return
+
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                cell = self._cells.get((x, y))
+                if cell is None:
+                    cell = self._cells[(x, y)] = dict()
+                cell[key] = obj
+
+    def remove(self, key: Hashable):
+        """
+        Removes object from grid. Does nothing if there is no object with this key
+        """
+        stored = self._objects.pop(key, None)
+        if stored is None:
+            return
+
+        if key in self._large_objects:
+            del self._large_objects[key]
+            return
+
+        left, top, right, bottom = stored[1]
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                cell = self._cells[(x, y)]
+                del cell[key]
+                if not cell:
+                    del self._cells[(x, y)]
+
+    def query(self, rect: pygame.Rect) -> Iterator[object]:
+        """
+        Yields every object from cells, covered by rect.
+
+        Objects are yielded once, but they are not guaranteed to intersect rect:
+        caller needs to check it by itself.
+        """
+        return self.query_range(self.get_cell_range(rect))
+
+    def query_range(self, cell_range: CellRange) -> Iterator[object]:
+        """
+        Yields every object from cells in cell_range, like query.
+
+        Objects can be added and removed while iterating
+        """
+        left, top, right, bottom = cell_range
+        yield from list(self._large_objects.values())
+
+        if left == right and top == bottom:
+            yield from list(self._cells.get((left, top), {}).values())
+            return
+
+        seen = set()
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                cell = self._cells.get((x, y))
+                if cell is None:
+                    continue
+
+                for key, obj in list(cell.items()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    yield obj
+
+    def clear(self):
+        self._cells = dict()
+        self._large_objects = dict()
+        self._objects = dict()
@@ -0,0 +1,278 @@
+"""
+Broad phase of collisions with sort and sweep over collider rects
+"""
+from typing import Callable, Dict, Hashable, List, Tuple, Union
+
+import numpy as np
+import pygame
+
+
+class SweepAndPrune:
+    """
+    Finds all pairs of overlapping colliders once per frame.
+
+    Rects of colliders are kept in NumPy arrays (by slots, slots of removed colliders are reused).
+    Moved rects are written into arrays only in find_pairs(), so moving collider costs one dict assignment.
+    find_pairs() sorts rects along one axis and sweeps them in one vectorized pass,
+    so dense clusters of colliders do not need a cast for every collider.
+
+    Static colliders never move, so they are sorted once and kept sorted until static colliders are changed.
+    Every frame only dynamic colliders are sorted and merged into them.
+
+    Objects can move after pairs are found, so rects of dynamic objects can be inflated by margins
+    (how far they can move until the next search), then pairs contain all objects, which can overlap in this frame.
+
+    Only pairs with at least one checking collider are needed (pairs of two colliders, which do not check collisions,
+    would never be used), and static colliders can not collide with each other, so only these pairs are produced
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self) -> None:
+        # (left, top, width, height) of every slot
+        self.rects = np.zeros((0, 4), dtype=np.int64)
+        self.checking = np.zeros(0, dtype=bool)
+        self.static = np.zeros(0, dtype=bool)
+        self.enabled = np.zeros(0, dtype=bool)
+        self.used = np.zeros(0, dtype=bool)
+        self._grow(self.INITIAL_CAPACITY)
+
+        self._objects: List[object] = [None] * self.capacity
+        self._free_slots: List[int] = list(range(self.capacity - 1, -1, -1))
+        # Key -> slot
+        self._slots: Dict[Hashable, int] = dict()
+        # Slot -> rect, which is not written into arrays yet
+        self._moved_rects: Dict[int, pygame.Rect] = dict()
+
+        # Sweep axis, slots of static colliders sorted by start on this axis and these starts.
+        # None, if static colliders were changed
+        self._static_sweep: Union[Tuple[int, np.ndarray, np.ndarray], None] = None
+
+    @property
+    def capacity(self) -> int:
+        return len(self.used)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def _grow(self, new_capacity: int):
+        added = new_capacity - self.capacity
+
+        self.rects = np.concatenate(
+            (self.rects, np.zeros((added, 4), dtype=np.int64)))
+        self.checking = np.concatenate(
+            (self.checking, np.zeros(added, dtype=bool)))
+        self.static = np.concatenate(
+            (self.static, np.zeros(added, dtype=bool)))
+        self.enabled = np.concatenate(
+            (self.enabled, np.zeros(added, dtype=bool)))
+        self.used = np.concatenate((self.used, np.zeros(added, dtype=bool)))
+
+    def add(self, key: Hashable, obj: object, rect: pygame.Rect, is_checking: bool, enabled=True, is_static=False):
+        if key in self._slots:
+            self.remove(key)
+
+        if not self._free_slots:
+            old_capacity = self.capacity
+            self._grow(old_capacity * 2)
+            self._objects += [None] * old_capacity
+            self._free_slots = list(
+                range(self.capacity - 1, old_capacity - 1, -1))
+
+        slot = self._slots[key] = self._free_slots.pop()
+        self._objects[slot] = obj
+        self.rects[slot] = tuple(rect)
+        self.checking[slot] = is_checking
+        self.static[slot] = is_static
+        self.enabled[slot] = enabled
+        self.used[slot] = True
+
+        if is_static:
+            self._static_sweep = None
+
+    def update(self, key: Hashable, rect: pygame.Rect):
+        """
+        Changes rect of object with key
+        """
+        slot = self._slots[key]
+
+        if self.static[slot]:
+            self.rects[slot] = tuple(rect)
+            self._static_sweep = None
+        else:
+            self._moved_rects[slot] = rect
+
+    def update_many(self, keys: List[Hashable], rects: np.ndarray):
+        """
+        Changes rects of objects with keys at once. rects - int array of (left, top, width, height) rows
+        """
+        if not keys:
+            return
+
+        slots = np.fromiter((self._slots[key] for key in keys), dtype=np.int64,
+                            count=len(keys))
+        self.rects[slots] = rects
+
+        # Older rects of these objects must not overwrite new ones
+        if self._moved_rects:
+            for slot in slots.tolist():
+                self._moved_rects.pop(slot, None)
+
+        if self.static[slots].any():
+            self._static_sweep = None
+
+    def remove(self, key: Hashable):
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+
+        if self.static[slot]:
+            self._static_sweep = None
+
+        self.used[slot] = False
+        self.enabled[slot] = False
+        self.checking[slot] = False
+        self.static[slot] = False
+        self._objects[slot] = None
+        self._moved_rects.pop(slot, None)
+        self._free_slots.append(slot)
+
+    def set_checking(self, key: Hashable, is_checking: bool):
+        slot = self._slots.get(key)
+        if slot is not None:
+            self.checking[slot] = is_checking
+
+    def set_enabled(self, key: Hashable, enabled: bool):
+        """
+        Disabled objects are not included in pairs
+        """
+        slot = self._slots.get(key)
+        if slot is not None:
+            self.enabled[slot] = enabled
+
+            if self.static[slot]:
+                self._static_sweep = None
+
+    def _write_moved_rects(self):
+        moved_rects = self._moved_rects
+        if not moved_rects:
+            return
+
+        slots = np.fromiter(moved_rects.keys(), dtype=np.int64,
+                            count=len(moved_rects))
+        self.rects[slots] = [tuple(rect) for rect in moved_rects.values()]
+        self._moved_rects = dict()
+
+    def _get_static_sweep(self, usable: np.ndarray) -> Tuple[int, np.ndarray, np.ndarray]:
+        if self._static_sweep is None:
+            slots = np.flatnonzero(usable & self.static)
+            rects = self.rects[slots]
+
+            # Sweeping along the axis, where rects are spread more, gives less candidates
+            axis = 0
+            if len(slots) and np.ptp(rects[:, 1]) > np.ptp(rects[:, 0]):
+                axis = 1
+
+            order = np.argsort(rects[:, axis])
+            self._static_sweep = (axis, slots[order], rects[order, axis])
+
+        return self._static_sweep
+
+    def find_pairs(self, get_margin: Union[Callable[[object], float], None] = None) -> List[Tuple[object, object]]:
+        """
+        Pairs of enabled objects, which rects overlap (like pygame.Rect.colliderect),
+        with at least one checking object and at least one not static object.
+
+        If get_margin is set, rect of every dynamic object is inflated by get_margin(object) on every side.
+
+        Every pair is returned once
+        """
+        if not self.checking.any():
+            return []
+
+        self._write_moved_rects()
+
+        rects = self.rects
+        usable = self.enabled & (rects[:, 2] > 0) & (rects[:, 3] > 0)
+        dynamic_slots = np.flatnonzero(usable & ~self.static)
+        if len(dynamic_slots) == 0 or not self.checking[usable].any():
+            return []
+
+        axis, static_slots, static_starts = self._get_static_sweep(usable)
+        if len(static_slots) == 0 and np.ptp(rects[dynamic_slots, 1]) > np.ptp(rects[dynamic_slots, 0]):
+            axis = 1
+
+        margins = np.zeros(self.capacity)
+        if get_margin is not None:
+            objects = self._objects
+            margins[dynamic_slots] = [get_margin(objects[slot])
+                                      for slot in dynamic_slots.tolist()]
+
+        dynamic_starts = rects[dynamic_slots, axis] - margins[dynamic_slots]
+        order = np.argsort(dynamic_starts)
+        dynamic_slots = dynamic_slots[order]
+        dynamic_starts = dynamic_starts[order]
+
+        # Merging sorted dynamic colliders into sorted static ones
+        slots = np.empty(len(static_slots) + len(dynamic_slots), dtype=np.int64)
+        slots[np.arange(len(static_slots)) + np.searchsorted(dynamic_starts, static_starts, side='left')] = \
+            static_slots
+        slots[np.arange(len(dynamic_slots)) + np.searchsorted(static_starts, dynamic_starts, side='right')] = \
+            dynamic_slots
+
+        rects = rects[slots]
+        margins = margins[slots]
+        other_axis = 1 - axis
+        starts = rects[:, axis] - margins
+        ends = rects[:, axis] + rects[:, 2 + axis] + margins
+        other_starts = rects[:, other_axis] - margins
+        other_ends = rects[:, other_axis] + rects[:, 2 + other_axis] + margins
+        checking = self.checking[slots]
+        static = self.static[slots]
+
+        # Rect i overlaps on sweep axis rects from i + 1 to range_ends[i] (not including), which start before its end.
+        # From them rect is paired only with rects of one kind, depending on itself:
+        # checking dynamic - with all, not checking dynamic - with checking,
+        # checking static - with dynamic, not checking static - with checking dynamic
+        range_starts = np.arange(1, len(slots) + 1)
+        range_ends = np.searchsorted(starts, ends, side='left')
+
+        kinds_indexes = (np.arange(len(slots)), np.flatnonzero(checking),
+                         np.flatnonzero(~static), np.flatnonzero(checking & ~static))
+        kinds_rects = (checking & ~static, ~checking & ~static,
+                       checking & static, ~checking & static)
+        # Indexes of all kinds in one array, so every rect can take its partners from it
+        all_kinds_indexes = np.concatenate(kinds_indexes)
+
+        partners_starts = np.empty(len(slots), dtype=np.int64)
+        partners_ends = np.empty(len(slots), dtype=np.int64)
+        offset = 0
+        for indexes, rects_of_kind in zip(kinds_indexes, kinds_rects):
+            rects_of_kind = np.flatnonzero(rects_of_kind)
+            partners_starts[rects_of_kind] = offset + np.searchsorted(
+                indexes, range_starts[rects_of_kind], side='left')
+            partners_ends[rects_of_kind] = offset + np.searchsorted(
+                indexes, range_ends[rects_of_kind], side='left')
+            offset += len(indexes)
+
+        counts = np.maximum(partners_ends - partners_starts, 0)
+
+        total = int(counts.sum())
+        if total == 0:
+            return []
+
+        first = np.repeat(np.arange(len(slots)), counts)
+        # Offset of every pair inside partners of its first rect
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = all_kinds_indexes[np.repeat(partners_starts, counts) + offsets]
+
+        overlapping = (other_starts[first] < other_ends[second]) & (
+            other_starts[second] < other_ends[first])
+        first = slots[first[overlapping]]
+        second = slots[second[overlapping]]
+
+        objects = self._objects
+        return [(objects[a], objects[b]) for a, b in zip(first.tolist(), second.tolist())]
@@ -1,11 +1,14 @@
-from json import loads, dumps
+from json import dumps
 from assets import FONT_30
+from entities.autosave import AutoSave
 from entities.json_parser import json_dict_into_object
 from entities.player import Player
+from entities.regions import RegionStreamer
+from entities.save_file import iter_entity_records
+from entities.save_journal import load_save
 from entities.ui import Button
 from pygame_entities.game import Game
 from pygame_entities.scenes import BaseScene
-from entities.json_parser import registered_classes
 from pygame_entities.utils.math import Vector2
 from scenes.new_game_generating import GameGenerationScene
 
@@ -18,17 +21,17 @@ class MainScene(BaseScene):
     NEEDS_TO_BE_GENERATED = False
     QUIT_TO_SCENE = None
 
+    # Интервал автосохранения в секундах
+    AUTOSAVE_INTERVAL = 60
+    # Сколько прошлых сохранений хранить рядом с сохранением
+    SAVE_BACKUPS = 2
+    COMPRESS_SAVES = True
+    # Сколько изменений дописывается в журнал сохранения до записи всего мира заново
+    COMPACT_SAVE_AFTER_CHANGES = 1000
+
     @classmethod
     def dump_to_json(cls, game: Game) -> str:
-        json_dict = {'entities': []}
-
-        for ent in game.enabled_entities:
-            if ent.__class__.__name__ not in registered_classes.keys():
-                continue
-
-            json_dict['entities'].append(ent.to_json())
-
-        return dumps(json_dict)
+        return dumps({'entities': list(iter_entity_records(game.enabled_entities))})
 
     @classmethod
     def on_load(cls, game: Game):
@@ -41,18 +44,27 @@ class MainScene(BaseScene):
                quit_to_main_menu,
                color=(255, 200, 255))
 
+        streamer = RegionStreamer()
+
         if cls.NEEDS_TO_BE_LOADED:
             try:
-                json_dict = None
+                player = None
 
-                with open(cls.FILE_TO_LOAD, 'r') as f:
-                    json_dict = loads(f.read())
+                # Сущности создаются сразу по мере чтения файла.
+                # Постройки и предметы сначала остаются записями, их будит streamer рядом с камерой
+                for ent_dict in load_save(cls.FILE_TO_LOAD):
+                    if streamer.is_streamed_record(ent_dict):
+                        streamer.add_record(ent_dict)
+                        continue
 
-                for ent_dict in json_dict['entities']:
                     ent = json_dict_into_object(ent_dict)
 
                     if isinstance(ent, Player):
+                        player = ent
                         game.camera_follow_entity(ent)
+
+                if player is not None:
+                    streamer.wake_near_regions(player.position, None)
             except:
                 quit_to_main_menu()
                 return
@@ -61,10 +73,14 @@ class MainScene(BaseScene):
             GameGenerationScene.SAVE_NAME = cls.FILE_TO_LOAD
             GameGenerationScene.on_load(game)
 
+        AutoSave(cls.FILE_TO_LOAD, cls.AUTOSAVE_INTERVAL,
+                 cls.SAVE_BACKUPS, cls.COMPRESS_SAVES, cls.COMPACT_SAVE_AFTER_CHANGES, streamer)
+
     @classmethod
     def on_end(cls, game: Game):
-        saved_json = cls.dump_to_json(game)
-
-        with open(f'{cls.FILE_TO_LOAD}', 'w', encoding='utf-8') as f:
-            f.write(saved_json)
-            f.flush()
+        # Последние изменения дописываются в журнал
+        for autosave in game.get_entities_of_type(AutoSave):
+            autosave.wait()
+            autosave.save()
+            autosave.wait()
+            autosave.report_error()
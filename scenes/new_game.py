@@ -1,7 +1,7 @@
 from functools import partial
-import os
 import pygame
 from assets import FONT_30, FONT_50
+from entities.save_file import list_saves
 from entities.ui import Button, InputField, Popup
 from pygame_entities.game import Game
 from pygame_entities.scenes import BaseScene
@@ -64,7 +64,7 @@ class NewGameScene(BaseScene):
                quit_game, color=(100, 100, 100))
 
         Button(Vector2(500, 100), "Load Game", FONT_50, color=(200, 255, 200))
-        for i, item in enumerate(os.listdir(SAVES_FOLDER)):
+        for i, item in enumerate(list_saves(SAVES_FOLDER)):
             Button(Vector2(500, i * 50 + 200),
                    f"Load {item}", FONT_30, partial(start_game_from_file, f"{SAVES_FOLDER}/{item}"))
 
@@ -6,7 +6,7 @@ from entities.building import snap_position_to_grid
 from entities.item import ItemEntity
 from entities.map import Map, SandTile, fill_map
 from entities.player import Player
-from entities.json_parser import registered_classes
+from entities.save_file import iter_entity_records, write_save
 from items.items import Rock, Wood, WoodenAxe
 from pygame_entities.game import Game
 from pygame_entities.scenes import BaseScene
@@ -39,6 +39,12 @@ class GameGenerationScene(BaseScene):
 
     MAP = None
 
+    # Сколько процессов использовать для генерации карты.
+    # Процессы запускаются только для карт, в которых хотя бы PARALLEL_GENERATION_MIN_CHUNKS чанков:
+    # запуск процессов стоит десятки миллисекунд, а карта 30x30 чанков в одном процессе генерируется примерно за 35 мс
+    GENERATION_WORKERS = os.cpu_count() or 1
+    PARALLEL_GENERATION_MIN_CHUNKS = 900
+
     @classmethod
     def spawn_stones(cls, game: Game):
         STONE_CLUSTERS = 15
@@ -108,20 +114,17 @@ class GameGenerationScene(BaseScene):
 
     @classmethod
     def dump_to_json(cls, game: Game) -> str:
-        json_dict = {'entities': []}
-
-        for ent in game.enabled_entities:
-            if ent.__class__.__name__ not in registered_classes.keys():
-                continue
-
-            json_dict['entities'].append(ent.to_json())
-
-        return dumps(json_dict)
+        return dumps({'entities': list(iter_entity_records(game.enabled_entities))})
 
     @classmethod
     def on_load(cls, game: Game):
         cls.MAP = Map(Vector2(), cls.CHUNK_SIZE, cls.MAP_SIZE, SandTile)
-        fill_map(cls.MAP, 0)
+
+        workers = 1
+        if cls.MAP_SIZE[0] * cls.MAP_SIZE[1] >= cls.PARALLEL_GENERATION_MIN_CHUNKS:
+            workers = cls.GENERATION_WORKERS
+
+        fill_map(cls.MAP, 0, workers=workers)
 
         player = Player(cls.MAP.get_map_size() / 2)
         game.camera_follow_entity(player)
@@ -129,11 +132,7 @@ class GameGenerationScene(BaseScene):
         ItemEntity(player.position, WoodenCrate.get_item_class()(5))
         cls.spawn_buildings(game)
 
-        saved_json = cls.dump_to_json(game)
-
-        with open(f'{cls.SAVE_NAME}', 'w', encoding='utf-8') as f:
-            f.write(saved_json)
-            f.flush()
+        write_save(cls.SAVE_NAME, iter_entity_records(game.enabled_entities))
 
     @classmethod
     def on_end(cls, game: Game):
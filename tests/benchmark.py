@@ -0,0 +1,371 @@
+"""
+Бенчмарк горячих мест движка и игры
+
+Запускается без окна (headless режим Game), можно запускать на сервере без дисплея:
+
+    python tests/benchmark.py
+    python tests/benchmark.py --scale 2 --only cast_rect update_entities
+    python tests/benchmark.py --save-baseline
+
+Каждый бенчмарк запускается для нескольких размеров N (их можно умножить через --scale).
+Для каждого размера выводится ops/sec (сколько раз операция выполняется в секунду)
+и items/sec (ops/sec * N).
+
+Результаты сравниваются с базовыми из JSON файла (по умолчанию tests/benchmark_baseline.json),
+если он есть. Если операция стала медленнее больше чем на --tolerance, она помечается как регрессия,
+и скрипт завершается с кодом 1. Базовые результаты зависят от машины, поэтому сохраняйте их
+через --save-baseline на той же машине, на которой потом сравниваете.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from inspect import getsourcefile
+from itertools import count, cycle
+from os import path
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+
+current_dir = path.dirname(path.abspath(getsourcefile(lambda: 0)))
+root_dir = current_dir[:current_dir.rfind(path.sep)]
+sys.path.insert(0, root_dir)
+# Ассеты загружаются по относительным путям
+os.chdir(root_dir)
+
+if True:
+    import pygame
+    from pygame_entities.game import Game
+
+    # Игра должна быть создана до загрузки ассетов, что бы дисплей сразу был без окна
+    game = Game.get_instance((800, 600), 60, headless=True)
+
+    from pygame_entities.entities.builtin_entities.particles import ParticleEngine, ParticleSystem
+    from pygame_entities.entities.mixins import CollisionMixin, VelocityMixin
+    from pygame_entities.utils.math import Vector2
+    from assets import Sprites, SPRITE_SIZE
+    from entities.json_parser import json_dict_into_object
+    from entities.item import ItemEntity
+    from entities.map import Map, SandTile, fill_map
+    from items import Inventory, Recipe, Wood, Iron, Gold, WoodenAxe, WoodenPickaxe, StonePickaxe
+    from items.items import Rock
+    from scenes.main import MainScene
+
+DEFAULT_BASELINE_PATH = path.join(current_dir, "benchmark_baseline.json")
+
+# Минимальное время замера одного повтора в секундах
+MIN_MEASURE_TIME = 0.2
+
+
+class StaticCollider(CollisionMixin):
+    def __init__(self, position: Vector2) -> None:
+        super().__init__(position)
+        self.collision_init(Vector2(*SPRITE_SIZE), is_static=True)
+
+
+class CheckingCollider(CollisionMixin):
+    def __init__(self, position: Vector2) -> None:
+        super().__init__(position)
+        self.collision_init(Vector2(*SPRITE_SIZE), is_check_collision=True)
+
+
+class MovingEntity(CollisionMixin, VelocityMixin):
+    def __init__(self, position: Vector2) -> None:
+        super().__init__(position)
+        self.collision_init(Vector2(*SPRITE_SIZE))
+        self.velocity_init(True)
+        self.velocity = Vector2(random.uniform(-100, 100),
+                                random.uniform(-100, 100))
+
+
+class StoredMovingEntity(MovingEntity):
+    USE_COMPONENT_STORE = True
+
+
+def get_world_size(entities_count: int) -> float:
+    """
+    Сторона квадрата мира, в котором entities_count сущностей размером с тайл стоят с постоянной плотностью
+    """
+    return (entities_count ** 0.5) * SPRITE_SIZE[0] * 4
+
+
+def random_position(world_size: float) -> Vector2:
+    return Vector2(random.uniform(0, world_size), random.uniform(0, world_size))
+
+
+# Бенчмарки. Каждый принимает N, готовит данные и возвращает операцию для замера.
+# Все созданные сущности удаляются после замера
+
+def bench_fill_map(n: int) -> Callable[[], None]:
+    """N x N чанков 10x10"""
+    tile_map = Map(Vector2(), (10, 10), (n, n), SandTile)
+    seeds = count()
+
+    return lambda: fill_map(tile_map, next(seeds))
+
+
+def bench_chunks_render_hide(n: int) -> Callable[[], None]:
+    """Показ и скрытие N чанков"""
+    side = max(int(n ** 0.5), 1)
+    tile_map = Map(Vector2(), (10, 10), (side, n // side), SandTile)
+    fill_map(tile_map, 1)
+    tile_map.disable()
+
+    def render_and_hide():
+        for chunk in tile_map.chunks:
+            chunk.render()
+        for chunk in tile_map.chunks:
+            chunk.hide()
+
+    return render_and_hide
+
+
+def bench_cast_rect(n: int) -> Callable[[], None]:
+    """Один cast_rect по коллайдеру среди N коллайдеров"""
+    world_size = get_world_size(n)
+    colliders = [StaticCollider(random_position(world_size)) for _ in range(n)]
+
+    rects = [random.choice(colliders).collider_rect for _ in range(1000)]
+    # Иначе замерялся бы только поиск в пустых клетках
+    assert all(CollisionMixin.cast_rect(rect) for rect in rects)
+    rects_iter = cycle(rects)
+
+    return lambda: CollisionMixin.cast_rect(next(rects_iter))
+
+
+def bench_update_entities(n: int) -> Callable[[], None]:
+    """Один кадр обновления N движущихся сущностей с коллайдерами"""
+    world_size = get_world_size(n)
+    for _ in range(n):
+        MovingEntity(random_position(world_size))
+
+    return game._update_entities
+
+
+def bench_update_stored_entities(n: int) -> Callable[[], None]:
+    """Один кадр движения N сущностей с коллайдерами в хранилище компонентов"""
+    world_size = get_world_size(n)
+    for _ in range(n):
+        StoredMovingEntity(random_position(world_size))
+
+    def update():
+        game._update_entities()
+        game.update_components(game.delta_time)
+
+    return update
+
+
+def bench_collision_pairs(n: int) -> Callable[[], None]:
+    """Поиск пар столкновений среди N проверяющих коллайдеров в плотной куче"""
+    world_size = get_world_size(n) / 4
+    for _ in range(n):
+        CheckingCollider(random_position(world_size))
+
+    return game._find_collision_candidates
+
+
+def bench_collision_pairs_static(n: int) -> Callable[[], None]:
+    """Поиск пар столкновений N / 20 проверяющих коллайдеров среди N статичных (постройки)"""
+    world_size = get_world_size(n)
+    for _ in range(n):
+        StaticCollider(random_position(world_size))
+    for _ in range(max(n // 20, 1)):
+        CheckingCollider(random_position(world_size))
+
+    return game._find_collision_candidates
+
+
+def bench_particles_burst(n: int) -> Callable[[], None]:
+    """Выпуск N партиклов"""
+    system = ParticleSystem(Vector2(), Sprites.WOOD, 2,
+                            min_particle_velocity=Vector2(-480, -480), max_particle_velocity=Vector2(480, 480))
+    engine = ParticleEngine.get_instance()
+
+    def burst():
+        engine.clear()
+        system.burst(n)
+
+    return burst
+
+
+def bench_particles_update(n: int) -> Callable[[], None]:
+    """Один кадр обновления N партиклов"""
+    system = ParticleSystem(Vector2(), Sprites.WOOD, 10 ** 6,
+                            min_particle_velocity=Vector2(-480, -480), max_particle_velocity=Vector2(480, 480))
+    system.burst(n)
+    engine = ParticleEngine.get_instance()
+
+    return lambda: engine.update_particles(game.delta_time)
+
+
+def bench_inventory_add_item(n: int) -> Callable[[], None]:
+    """Добавление N предметов в инвентарь на 10 слотов"""
+    item_types = [Wood, Iron, Gold, Rock, WoodenAxe]
+    amounts = [(random.choice(item_types), random.randint(1, 5))
+               for _ in range(n)]
+
+    def add_items():
+        inventory = Inventory(10)
+        for item_type, amount in amounts:
+            inventory.add_item(item_type(amount))
+
+    return add_items
+
+
+def bench_recipe_craft(n: int) -> Callable[[], None]:
+    """Крафт из N ингредиентов"""
+    recipe = Recipe("Stone Pickaxe", {Wood: 1, Rock: 2}, {StonePickaxe: 1})
+    item_types = [Wood, Rock, Iron, Gold, WoodenPickaxe]
+
+    def craft():
+        ingredients = [item_types[i % len(item_types)](5) for i in range(n)]
+        recipe.craft(ingredients)
+
+    return craft
+
+
+def bench_save_load(n: int) -> Callable[[], None]:
+    """Сохранение через MainScene.dump_to_json и загрузка через json_dict_into_object N предметов на земле"""
+    world_size = get_world_size(n)
+    for _ in range(n):
+        ItemEntity(random_position(world_size), Wood(random.randint(1, 5)))
+
+    def save_and_load():
+        records = json.loads(MainScene.dump_to_json(game))['entities']
+        loaded = [json_dict_into_object(record) for record in records]
+
+        for entity in loaded:
+            entity.destroy()
+
+    return save_and_load
+
+
+# Имя -> (функция, размеры N по умолчанию)
+BENCHMARKS: Dict[str, Tuple[Callable[[int], Callable[[], None]], List[int]]] = {
+    "fill_map": (bench_fill_map, [5, 10, 20]),
+    "chunks_render_hide": (bench_chunks_render_hide, [4, 16, 64]),
+    "cast_rect": (bench_cast_rect, [100, 1000, 10000]),
+    "update_entities": (bench_update_entities, [100, 1000, 5000]),
+    "update_stored_entities": (bench_update_stored_entities, [100, 1000, 5000]),
+    "collision_pairs": (bench_collision_pairs, [100, 1000, 5000]),
+    "collision_pairs_static": (bench_collision_pairs_static, [100, 1000, 10000]),
+    "particles_burst": (bench_particles_burst, [100, 1000, 10000]),
+    "particles_update": (bench_particles_update, [100, 1000, 10000]),
+    "inventory_add_item": (bench_inventory_add_item, [10, 100, 1000]),
+    "recipe_craft": (bench_recipe_craft, [10, 100, 1000]),
+    "save_load": (bench_save_load, [100, 1000, 5000]),
+}
+
+
+def measure(operation: Callable[[], None], repeat: int) -> float:
+    """
+    ops/sec операции, лучший из repeat повторов.
+
+    Количество запусков в повторе подбирается так, что бы повтор шел не меньше MIN_MEASURE_TIME
+    """
+    operation()
+
+    runs = 1
+    while True:
+        start = perf_counter()
+        for _ in range(runs):
+            operation()
+        elapsed = perf_counter() - start
+
+        if elapsed >= MIN_MEASURE_TIME:
+            break
+        runs = runs * 2 if elapsed <= 0 else int(runs * MIN_MEASURE_TIME / elapsed * 1.2) + 1
+
+    best = elapsed / runs
+    for _ in range(repeat - 1):
+        start = perf_counter()
+        for _ in range(runs):
+            operation()
+        best = min(best, (perf_counter() - start) / runs)
+
+    return 1 / best
+
+
+def run_benchmark(name: str, n: int, repeat: int) -> float:
+    random.seed(0)
+    function, _ = BENCHMARKS[name]
+
+    try:
+        return measure(function(n), repeat)
+    finally:
+        game.destroy_all_unpersistent_entities()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark of engine hot paths")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS.keys()),
+                        help="run only these benchmarks")
+    parser.add_argument("--scale", type=float, default=1,
+                        help="multiplier for sizes N of all benchmarks")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="repeats of every measure, the best one is used")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH,
+                        help="JSON file with baseline results")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="save results as new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown relative to baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    baseline = dict()
+    if path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results: Dict[str, Dict[str, float]] = dict()
+    regressions = list()
+
+    print(f"{'benchmark':<22}{'N':>8}{'ops/sec':>14}{'items/sec':>14}{'baseline':>14}{'change':>10}")
+
+    for name in args.only or BENCHMARKS.keys():
+        _, sizes = BENCHMARKS[name]
+        results[name] = dict()
+
+        # При маленьком --scale разные размеры могут стать одинаковым N, он замеряется один раз
+        for n in sorted({max(int(size * args.scale), 1) for size in sizes}):
+            ops = run_benchmark(name, n, args.repeat)
+            results[name][str(n)] = ops
+
+            baseline_ops = baseline.get(name, dict()).get(str(n))
+            baseline_text = change_text = ""
+            if baseline_ops is not None:
+                change = ops / baseline_ops - 1
+                baseline_text = f"{baseline_ops:.1f}"
+                change_text = f"{change:+.1%}"
+
+                if change < -args.tolerance:
+                    change_text += " !"
+                    regressions.append(f"{name} N={n}: {change:+.1%}")
+
+            print(f"{name:<22}{n:>8}{ops:>14.1f}{ops * n:>14.1f}{baseline_text:>14}{change_text:>10}")
+
+    if args.save_baseline:
+        # Остальные бенчмарки старой базы остаются
+        saved = dict()
+        if path.exists(args.baseline):
+            with open(args.baseline) as f:
+                saved = json.load(f)
+
+        for name, sizes_results in results.items():
+            saved.setdefault(name, dict()).update(sizes_results)
+
+        with open(args.baseline, "w") as f:
+            json.dump(saved, f, indent=4)
+
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
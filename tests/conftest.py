@@ -0,0 +1,36 @@
+"""
+Общие настройки автотестов (pytest)
+
+Игра создается один раз без окна (headless режим Game), после каждого теста все сущности удаляются.
+Остальные файлы в tests - ручные демо, pytest их не собирает
+"""
+import os
+from inspect import getsourcefile
+from os import path
+import sys
+
+import pytest
+
+
+current_dir = path.dirname(path.abspath(getsourcefile(lambda: 0)))
+root_dir = current_dir[:current_dir.rfind(path.sep)]
+sys.path.insert(0, root_dir)
+# Ассеты загружаются по относительным путям
+os.chdir(root_dir)
+
+if True:
+    from pygame_entities.game import Game
+
+    # Игра должна быть создана до загрузки ассетов, что бы дисплей сразу был без окна
+    Game.get_instance((800, 600), 60, headless=True)
+
+collect_ignore = ["benchmark.py", "buildings.py", "items_test.py",
+                  "map.py", "player.py", "ui_test.py"]
+
+
+@pytest.fixture
+def game() -> Game:
+    game = Game.get_instance()
+    yield game
+    game.destroy_all_unpersistent_entities()
+    game.camera_follow_entity(None)
@@ -43,7 +43,7 @@ class TestPlayer(SpriteMixin, BlockingCollisionMixin, VelocityMixin):
         if keys[pygame.K_s]:
             direction.y += 1
 
-        self.velocity = direction.normalized() * TestPlayer.SPEED * delta_time
+        self.velocity = direction.normalized() * TestPlayer.SPEED
 
 
 def on_quit_event(event: pygame.event.Event):
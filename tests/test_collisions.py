@@ -0,0 +1,49 @@
+"""
+Тесты столкновений
+"""
+import pytest
+
+from pygame_entities.entities.mixins import BlockingCollisionMixin, CollisionMixin, VelocityMixin
+from pygame_entities.utils.math import Vector2
+
+
+class Wall(CollisionMixin):
+    def __init__(self, position: Vector2, size: Vector2, is_static=False) -> None:
+        super().__init__(position)
+        self.collision_init(size, is_static=is_static)
+
+
+class Mover(BlockingCollisionMixin, VelocityMixin):
+    """
+    Сначала двигается, потом проверяет столкновения (как сущности, у которых velocity_init раньше collision_init)
+    """
+
+    def __init__(self, position: Vector2) -> None:
+        super().__init__(position)
+        self.velocity_init(True)
+        self.collision_init(Vector2(32, 32))
+
+
+@pytest.mark.parametrize("is_static_wall", [False, True])
+@pytest.mark.parametrize("pixels_per_frame", [5, 30])
+def test_fast_mover_is_blocked_by_wall(game, pixels_per_frame, is_static_wall):
+    Wall(Vector2(200, 0), Vector2(64, 64), is_static_wall)
+    mover = Mover(Vector2(0, 0))
+    mover.velocity = Vector2(pixels_per_frame * 60, 0)
+
+    positions = list()
+    for _ in range(60):
+        game.step(delta_time=1 / 60)
+        positions.append(mover.position.x)
+
+    # Левый край стены 168, половина размера 16
+    assert positions[-10:] == [152] * 10
+
+
+def test_collision_candidates_skip_destroyed_colliders(game):
+    wall = Wall(Vector2(0, 0), Vector2(64, 64))
+    mover = Mover(Vector2(0, 0))
+    game.step(delta_time=1 / 60)
+
+    wall.destroy()
+    assert game.get_collision_candidates(mover) == []
@@ -0,0 +1,81 @@
+"""
+Тесты хранилища компонентов
+"""
+from pygame_entities.entities.mixins import BlockingCollisionMixin, CollisionMixin, VelocityMixin
+from pygame_entities.utils.math import Vector2
+
+
+class Mover(CollisionMixin, VelocityMixin):
+    def __init__(self, position: Vector2, velocity: Vector2) -> None:
+        super().__init__(position)
+        self.collision_init(Vector2(30, 20), is_check_collision=True)
+        self.velocity_init(False, 0.1)
+        self.velocity = velocity
+
+
+class StoredMover(Mover):
+    USE_COMPONENT_STORE = True
+
+
+def test_stored_entities_move_like_not_stored(game):
+    mover = Mover(Vector2(0, 0), Vector2(300, -200))
+    stored_mover = StoredMover(Vector2(0, 0), Vector2(300, -200))
+
+    for delta_time in (1 / 60, 1 / 30, 1 / 144, 1 / 60):
+        game.step(delta_time=delta_time)
+
+        assert stored_mover.position.get_tuple() == mover.position.get_tuple()
+        assert stored_mover.velocity.get_tuple() == mover.velocity.get_tuple()
+
+
+def test_colliders_of_stored_entities_are_updated(game):
+    stored_movers = [StoredMover(Vector2(i * 100, 0), Vector2(0, 600 + i))
+                     for i in range(5)]
+    for _ in range(30):
+        game.step(delta_time=1 / 60)
+
+    broad_phase = game._collisions_broad_phase
+    broad_phase._write_moved_rects()
+    for stored_mover in stored_movers:
+        rect = stored_mover.collider_rect
+
+        assert rect.top > 50
+        assert tuple(broad_phase.rects[broad_phase._slots[stored_mover.id]]) == tuple(rect)
+        assert stored_mover in CollisionMixin.cast_rect(rect)
+
+    # Коллайдер, который стоит на пути, находит сущность в парах столкновений
+    checking = Mover(stored_movers[0].position, Vector2(0, 0))
+    game.step(delta_time=1 / 60)
+
+    assert stored_movers[0] in game.get_collision_candidates(checking)
+
+
+class Wall(CollisionMixin):
+    def __init__(self, position: Vector2, size: Vector2) -> None:
+        super().__init__(position)
+        self.collision_init(size)
+
+
+class StoredBlockingMover(BlockingCollisionMixin, VelocityMixin):
+    USE_COMPONENT_STORE = True
+
+    def __init__(self, position: Vector2) -> None:
+        super().__init__(position)
+        self.collision_init(Vector2(32, 32))
+        self.velocity_init(True)
+
+
+def test_fast_stored_entity_does_not_pass_through_wall(game):
+    Wall(Vector2(200, 0), Vector2(64, 64))
+    mover = StoredBlockingMover(Vector2(0, 0))
+    mover.velocity = Vector2(30 * 60, 0)
+
+    positions = list()
+    for _ in range(60):
+        game.step(delta_time=1 / 60)
+        positions.append(mover.position.x)
+
+    # Хранилище двигает сущности после проверки столкновений, поэтому в конце кадра она на один шаг в стене.
+    # Левый край стены 168, половина размера 16
+    assert max(positions) == 152 + 30
+    assert positions[-10:] == [152 + 30] * 10
@@ -0,0 +1,71 @@
+"""
+Тесты генерации карты
+"""
+import pygame
+import pytest
+
+from entities.map import Map, SandTile, WaterTile, fill_map
+from pygame_entities.utils.math import Vector2
+
+
+@pytest.mark.parametrize("map_size", [(5, 3), (4, 9)])
+def test_parallel_generation_matches_single_process(game, map_size):
+    single_process_map = Map(Vector2(), (7, 4), map_size, SandTile)
+    parallel_map = Map(Vector2(), (7, 4), map_size, SandTile)
+
+    fill_map(single_process_map, 3)
+    fill_map(parallel_map, 3, workers=2)
+
+    assert [chunk.tiles for chunk in parallel_map.chunks] == [
+        chunk.tiles for chunk in single_process_map.chunks]
+    assert len({tile for chunk in parallel_map.chunks for tile in chunk.tiles}) > 1
+
+
+def test_hidden_chunk_is_not_rebaked_until_tiles_change(game):
+    chunk = Map(Vector2(), (4, 4), (1, 1), SandTile).chunks[0]
+
+    chunk.render()
+    baked_surface = chunk._baked_surface
+    chunk.hide()
+    chunk.render()
+
+    assert chunk._baked_surface is baked_surface
+    assert not baked_surface.get_flags() & pygame.SRCALPHA
+
+    chunk.set_tile((0, 0), WaterTile)
+    chunk.reload()
+
+    assert chunk._baked_surface is not baked_surface
+
+
+def test_map_keeps_only_last_hidden_baked_chunks(game):
+    tile_map = Map(Vector2(), (2, 2), (10, 1), SandTile)
+    chunk_width = 2 * tile_map.tile_size[0]
+
+    # Камера проходит по карте слева направо, чанки позади нее прячутся
+    for col in range(10):
+        game._camera_position = Vector2(col * chunk_width, 0)
+        for _ in range(10):
+            tile_map.render_chunks(0)
+
+    shown = [chunk for chunk in tile_map.chunks if not chunk.is_hidden]
+    baked_hidden = [chunk for chunk in tile_map.chunks
+                    if chunk.is_hidden and chunk._baked_surface is not None]
+
+    assert len(baked_hidden) == Map.BAKED_HIDDEN_CHUNKS
+    assert tile_map.chunks[0].is_hidden and tile_map.chunks[0]._baked_surface is None
+    assert len(shown) < 10
+    game._camera_position = Vector2(0, 0)
+
+
+def test_only_chunks_near_screen_are_shown(game):
+    tile_map = Map(Vector2(), (10, 10), (10, 10), SandTile)
+    game._camera_position = Vector2(0, 0)
+    for _ in range(50):
+        tile_map.render_chunks(0)
+
+    chunk_width = 10 * tile_map.tile_size[0]
+    screen_width, screen_height = game.screen_resolution
+    assert {(col, row) for col, row in tile_map._shown_chunks} == {
+        (col, row) for col in range((screen_width + Map.RENDER_MARGIN) // chunk_width + 1)
+        for row in range((screen_height + Map.RENDER_MARGIN) // chunk_width + 1)}
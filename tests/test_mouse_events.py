@@ -0,0 +1,48 @@
+"""
+Тесты событий мыши
+"""
+import pygame
+
+from pygame_entities.entities.mixins import MouseEventMixin
+from pygame_entities.utils.math import Vector2
+
+
+class Clickable(MouseEventMixin):
+    def __init__(self, position: Vector2, size: Vector2, clicks: list, is_static=True) -> None:
+        super().__init__(position)
+        self.collision_init(size, is_static=is_static)
+        self.mouse_events_init()
+        self.subscribe_on_mouse_down(lambda button: clicks.append((self, button)))
+
+
+def click(game):
+    pygame.event.post(pygame.event.Event(
+        pygame.MOUSEBUTTONDOWN, button=1, pos=pygame.mouse.get_pos()))
+    game.step()
+
+
+def test_click_reaches_entities_under_cursor_in_order_of_creation(game):
+    cursor = game.from_screen_to_world_point(
+        Vector2.from_tuple(pygame.mouse.get_pos()))
+    clicks = list()
+
+    big = Clickable(cursor, Vector2(400, 400), clicks)
+    small = Clickable(cursor, Vector2(10, 10), clicks, is_static=False)
+    Clickable(cursor + Vector2(100, 100), Vector2(10, 10), clicks)
+    click(game)
+
+    assert clicks == [(big, 1), (small, 1)]
+
+
+def test_click_reaches_disabled_entities(game):
+    cursor = game.from_screen_to_world_point(
+        Vector2.from_tuple(pygame.mouse.get_pos()))
+    clicks = list()
+
+    disabled = Clickable(cursor, Vector2(10, 10), clicks)
+    disabled.disable()
+    destroyed = Clickable(cursor, Vector2(10, 10), clicks)
+    destroyed.destroy()
+    click(game)
+
+    assert clicks == [(disabled, 1)]
@@ -0,0 +1,45 @@
+"""
+Тесты отрисовки
+"""
+import pygame
+
+from pygame_entities.entities.builtin_entities.particles import ParticleEngine
+from pygame_entities.utils.math import Vector2
+from assets import FONT_30
+from entities.ui import Popup
+
+
+def test_world_space_popup_is_drawn(game):
+    popup = Popup(Vector2(300, 200), "Picked up!", FONT_30, False)
+    game.step(render=True)
+
+    assert popup.sprite.rect.size == popup.sprite.image.get_size()
+    assert game.render_stats == (1, 0)
+
+
+def test_world_space_popup_outside_of_camera_is_culled(game):
+    Popup(Vector2(5000, 5000), "Picked up!", FONT_30, False)
+    game.step(render=True)
+
+    assert game.render_stats == (0, 1)
+
+
+def test_empty_text_popup_is_not_culled(game):
+    Popup(Vector2(300, 200), "", FONT_30, False)
+    game.step(render=True)
+
+    assert game.render_stats == (1, 0)
+
+
+def test_particle_on_viewport_edge_is_drawn(game):
+    engine = ParticleEngine.get_instance()
+    image = pygame.Surface((40, 40))
+    viewport = pygame.Rect(0, 0, 800, 600)
+    # Центры первых двух партиклов за краями экрана, но половины их картинок на экране
+    for position in (Vector2(815, 300), Vector2(300, -15), Vector2(900, 300)):
+        engine.emit(position, 1, image, 10, Vector2(), Vector2(), Vector2(), Vector2())
+
+    blits = engine.get_layer_blits(0, (0, 0), viewport)
+
+    assert sorted(position for _, position in blits) == [(280, -35), (795, 280)]
+    engine.clear()
@@ -0,0 +1,25 @@
+"""
+Тесты файлов сохранений
+"""
+from entities.save_file import list_saves, write_save
+
+
+def test_list_saves_skips_backups_journals_and_temp_files(tmp_path):
+    path = str(tmp_path / "world")
+    for _ in range(3):
+        write_save(path, [], backups=2)
+    (tmp_path / "world.journal").write_bytes(b"")
+    (tmp_path / "world.journal.tmp").write_bytes(b"")
+    write_save(str(tmp_path / "other"), [])
+    # Недописанное сохранение
+    (tmp_path / "other.tmp").write_bytes(b"")
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "other", "other.tmp", "world", "world.1", "world.2", "world.journal", "world.journal.tmp"]
+    assert list_saves(str(tmp_path)) == ["other", "world"]
+
+
+def test_list_saves_keeps_names_with_numbers(tmp_path):
+    write_save(str(tmp_path / "world.2"), [])
+
+    assert list_saves(str(tmp_path)) == ["world.2"]
@@ -0,0 +1,91 @@
+"""
+Тесты сохранения изменений мира
+"""
+from entities.autosave import AutoSave
+from entities.json_parser import register_json
+from entities.save_journal import SaveChangesTracker, load_save, mark_dirty
+from pygame_entities.entities.entity import Entity
+from pygame_entities.utils.math import Vector2
+
+
+@register_json
+class Crate(Entity):
+    """
+    Сохраняемая сущность, которая считает вызовы `to_json()`
+    """
+
+    def __init__(self, position: Vector2) -> None:
+        super().__init__(position)
+        self.to_json_calls = 0
+
+    def to_json(self) -> dict:
+        self.to_json_calls += 1
+        return {'type': self.__class__.__name__, 'position': self.position.get_tuple()}
+
+
+def test_collect_changes_checks_only_changed_entities(game):
+    crates = [Crate(Vector2(i, 0)) for i in range(100)]
+    tracker = SaveChangesTracker()
+    tracker.snapshot()
+
+    moved = crates[10]
+    moved.position = Vector2(-1, -1)
+    mark_dirty(moved)
+    new_crate = Crate(Vector2(0, 0))
+    for crate in crates:
+        crate.to_json_calls = 0
+
+    changes = tracker.collect_changes()
+
+    assert [change['op'] for change in changes] == ['put', 'put']
+    assert [crate for crate in crates if crate.to_json_calls] == [moved]
+    assert new_crate.to_json_calls == 1
+    tracker.close()
+
+
+def test_destroyed_dirty_entities_are_not_kept(game):
+    crate = Crate(Vector2(0, 0))
+    tracker = SaveChangesTracker()
+    tracker.snapshot()
+
+    mark_dirty(crate)
+    crate.destroy()
+
+    assert tracker.collect_changes() == [{'op': 'delete', 'key': 0}]
+    assert tracker._dirty == dict()
+    tracker.close()
+
+
+def test_closed_tracker_does_not_collect_dirty_entities(game):
+    crate = Crate(Vector2(0, 0))
+    old_tracker = SaveChangesTracker()
+    old_tracker.snapshot()
+    old_tracker.close()
+    tracker = SaveChangesTracker()
+    tracker.snapshot()
+
+    mark_dirty(crate)
+
+    assert old_tracker._dirty == dict()
+    assert crate.id in tracker._dirty
+    tracker.close()
+
+
+def test_autosave_reports_error_and_rewrites_snapshot(game, tmp_path, capsys):
+    crate = Crate(Vector2(0, 0))
+    path = tmp_path / "world" / "save"
+    # Папки сохранения еще нет, поэтому первый снимок не запишется
+    autosave = AutoSave(str(path), compress=False)
+    autosave.wait()
+
+    path.parent.mkdir()
+    crate.position = Vector2(5, 5)
+    mark_dirty(crate)
+    autosave.save()
+    autosave.wait()
+
+    assert "failed" in capsys.readouterr().out
+    assert autosave.last_error is None
+    assert [record for record in load_save(str(path)) if record['type'] == 'Crate'] == [
+        {'type': 'Crate', 'position': [5, 5]}]
+    autosave.destroy()